@@ -0,0 +1,72 @@
+"""Лёгкий счётчик обращений к страницам.
+
+Обращения копятся в памяти процесса и раз в ACCESS_FLUSH_INTERVAL
+секунд добавляются в кэш, в корзину текущего часа. Запись в кэш не
+атомарна, и одновременные сбросы нескольких процессов могут потерять
+часть обращений: для выбора самых посещаемых страниц это неважно.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+# сколько самых частых ключей хранить в одной корзине
+BUCKET_KEEP = 1000
+
+
+def bucket_key(kind, bucket):
+    return f'access:{kind}:{bucket}'
+
+
+class AccessCounter:
+    def __init__(self):
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.flushed = time.monotonic()
+
+    def record(self, kind, key):
+        with self.lock:
+            self.counts[kind, key] += 1
+            if time.monotonic() - self.flushed < (
+                settings.ACCESS_FLUSH_INTERVAL
+            ):
+                return
+            counts, self.counts = self.counts, Counter()
+            self.flushed = time.monotonic()
+        self.flush(counts)
+
+    def flush(self, counts=None):
+        if counts is None:
+            with self.lock:
+                counts, self.counts = self.counts, Counter()
+        bucket = int(time.time() // settings.ACCESS_BUCKET)
+        by_kind = {}
+        for (kind, key), count in counts.items():
+            by_kind.setdefault(kind, Counter())[key] += count
+        timeout = settings.ACCESS_BUCKET * settings.ACCESS_BUCKETS
+        for kind, kind_counts in by_kind.items():
+            key = bucket_key(kind, bucket)
+            kind_counts.update(cache.get(key, {}))
+            cache.set(key, dict(kind_counts.most_common(BUCKET_KEEP)),
+                      timeout)
+
+    def totals(self, kind):
+        """Число обращений по ключам за последние ACCESS_BUCKETS корзин."""
+        bucket = int(time.time() // settings.ACCESS_BUCKET)
+        keys = [
+            bucket_key(kind, bucket - age)
+            for age in range(settings.ACCESS_BUCKETS)
+        ]
+        total = Counter()
+        for counts in cache.get_many(keys).values():
+            total.update(counts)
+        return total
+
+    def top(self, kind, limit):
+        """Самые частые ключи за последние ACCESS_BUCKETS корзин."""
+        return [key for key, _ in self.totals(kind).most_common(limit)]
+
+
+access_counter = AccessCounter()
@@ -0,0 +1,157 @@
+"""ASGI-сервер поверх WSGI-приложения Django.
+
+Django 2.2 не умеет обрабатывать запросы асинхронно, поэтому views
+остаются синхронными. Зато чтение тела запроса и отправка ответа
+медленным клиентам происходят в цикле событий: поток из ограниченного
+пула занят только пока работает само приложение.
+"""
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+# тело запроса больше этого размера сбрасывается на диск
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+class AsgiHandler:
+    def __init__(self, application, max_workers=None):
+        self.application = application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.ASGI_THREADS,
+            thread_name_prefix='asgi',
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип: {scope["type"]}')
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        status, headers, chunks, iterator = await loop.run_in_executor(
+            self.executor, self.call_application, self.environ(scope, body)
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers,
+        })
+        for chunk in chunks:
+            await send({'type': 'http.response.body', 'body': chunk,
+                        'more_body': True})
+        while iterator is not None:
+            chunk = await loop.run_in_executor(
+                self.executor, self.next_chunk, iterator
+            )
+            if chunk is None:
+                break
+            await send({'type': 'http.response.body', 'body': chunk,
+                        'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                body.seek(0)
+                return body
+
+    def environ(self, scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        path = scope['path'].encode('utf-8').decode('latin-1')
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': path,
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'REMOTE_ADDR': client[0],
+            'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            if name in environ:
+                # HTTP/2 присылает cookie отдельными заголовками, а их
+                # склеивают через '; ' (RFC 7540, 8.1.2.5)
+                separator = '; ' if name == 'HTTP_COOKIE' else ','
+                value = f'{environ[name]}{separator}{value}'
+            environ[name] = value
+        return environ
+
+    def call_application(self, environ):
+        """Вызывает WSGI-приложение в потоке пула до первого куска тела."""
+        response = {}
+        chunks = []
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+            return chunks.append
+
+        iterator = ResultIterator(self.application(environ, start_response))
+        chunk = self.next_chunk(iterator)
+        if chunk is None:
+            iterator = None
+        else:
+            chunks.append(chunk)
+        return response['status'], response['headers'], chunks, iterator
+
+    def next_chunk(self, iterator):
+        for chunk in iterator:
+            if chunk:
+                return chunk
+        iterator.close()
+        return None
+
+
+class ResultIterator:
+    """Итератор по ответу WSGI, который можно закрыть (PEP 3333)."""
+
+    def __init__(self, result):
+        self.result = result
+        self.iterator = iter(result)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.iterator)
+
+    def close(self):
+        if hasattr(self.result, 'close'):
+            self.result.close()
@@ -0,0 +1,14 @@
+from django.conf import settings
+
+
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    """Выполняет settings.SQLITE_PRAGMAS на каждом новом подключении.
+
+    journal_mode=WAL позволяет читателям не ждать писателя, а
+    busy_timeout заставляет писателей ждать блокировку, а не падать
+    сразу с ``database is locked``.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+        connection.connection.execute(f'PRAGMA {pragma} = {value}')
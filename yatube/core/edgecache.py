@@ -0,0 +1,116 @@
+"""Кэширование ответов на обратном прокси и их сброс.
+
+Декоратор cache_policy объявляет, сколько прокси может хранить ответ
+гостю; ответы пользователям и ответы с cookies помечаются private.
+Заголовок Surrogate-Key перечисляет объекты, из которых собрана
+страница, а purge() после коммита транзакции отправляет на
+settings.EDGE_PURGE_URL запрос сброса всех страниц с этими ключами.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import wraps
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+logger = logging.getLogger(__name__)
+
+SURROGATE_KEY = 'Surrogate-Key'
+
+
+def cache_policy(s_maxage, stale_while_revalidate=0, max_age=0):
+    """Cache-Control для прокси: public у гостей, private у остальных."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = view_func(request, *args, **kwargs)
+            # страница зависит от того, вошёл ли пользователь
+            patch_vary_headers(response, ('Cookie',))
+            if response.has_header('Cache-Control'):
+                return response
+            if (
+                request.method not in ('GET', 'HEAD')
+                or response.status_code != 200
+                or request.user.is_authenticated
+                or response.cookies
+                or request.META.get('CSRF_COOKIE_USED')
+            ):
+                patch_cache_control(response, private=True, no_cache=True)
+                return response
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=max_age,
+                s_maxage=s_maxage,
+                stale_while_revalidate=stale_while_revalidate,
+            )
+            return response
+        return wrapper
+    return decorator
+
+
+def add_surrogate_keys(response, *keys):
+    current = response.get(SURROGATE_KEY, '').split()
+    response[SURROGATE_KEY] = ' '.join(
+        current + [key for key in keys if key not in current]
+    )
+    return response
+
+
+class PurgeDispatcher:
+    """Отправляет ключи после коммита, объединяя их в один запрос.
+
+    Запрос уходит из отдельного потока, чтобы медленный прокси не
+    задерживал ответ пользователю; ключи, накопившиеся пока поток был
+    занят, уходят следующим запросом. Ошибки только пишутся в лог.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = set()
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='edge-purge'
+        )
+        self.pending = set()
+
+    def purge(self, *keys):
+        if settings.EDGE_PURGE_URL:
+            # после отката транзакции сбрасывать нечего
+            transaction.on_commit(lambda: self.schedule(keys))
+
+    def schedule(self, keys):
+        with self.lock:
+            self.keys.update(keys)
+        future = self.executor.submit(self.flush)
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+
+    def flush(self):
+        with self.lock:
+            keys, self.keys = self.keys, set()
+        if keys:
+            self.send(sorted(keys))
+
+    def send(self, keys):
+        try:
+            response = requests.request(
+                settings.EDGE_PURGE_METHOD,
+                settings.EDGE_PURGE_URL,
+                headers={SURROGATE_KEY: ' '.join(keys)},
+                timeout=settings.EDGE_PURGE_TIMEOUT,
+            )
+            response.raise_for_status()
+        except requests.RequestException:
+            logger.warning('Не удалось сбросить кэш прокси: %s', keys,
+                           exc_info=True)
+
+    def wait(self, timeout=None):
+        """Ждёт отправки всех запланированных запросов."""
+        wait(list(self.pending), timeout)
+
+
+purger = PurgeDispatcher()
+purge = purger.purge
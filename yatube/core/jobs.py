@@ -0,0 +1,83 @@
+"""Фоновые задачи с прогрессом в кэше.
+
+Задача выполняется в пуле потоков процесса; её состояние (сколько
+сделано из скольких, статус, ошибка) лежит в кэше под job_key(id) и
+доступно из любого процесса с тем же кэшем. При settings.JOBS_EAGER
+задача выполняется сразу в вызывающем потоке - так её видно в тестах.
+"""
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+RUNNING, DONE, FAILED = 'running', 'done', 'failed'
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.JOB_WORKERS, thread_name_prefix='job'
+)
+
+
+def job_key(job_id):
+    return f'job:{job_id}'
+
+
+def job_status(job_id):
+    return cache.get(job_key(job_id))
+
+
+class Progress:
+    """Передаётся задаче: progress(done, total) обновляет состояние."""
+
+    def __init__(self, job_id, name):
+        self.key = job_key(job_id)
+        self.state = {'name': name, 'status': RUNNING, 'done': 0,
+                      'total': None, 'error': ''}
+        self.save()
+
+    def __call__(self, done, total=None):
+        self.state['done'] = done
+        if total is not None:
+            self.state['total'] = total
+        self.save()
+
+    def finish(self, status, error=''):
+        self.state.update(status=status, error=error)
+        self.save()
+
+    def save(self):
+        cache.set(self.key, dict(self.state), settings.JOB_STATUS_TIMEOUT)
+
+
+def run(progress, func, args):
+    try:
+        func(*args, progress=progress)
+    except Exception as error:
+        logger.exception('Задача %s завершилась ошибкой',
+                         progress.state['name'])
+        progress.finish(FAILED, str(error))
+    else:
+        progress.finish(DONE)
+
+
+def run_in_thread(progress, func, args):
+    try:
+        run(progress, func, args)
+    finally:
+        # у потока пула своё соединение с базой
+        connections.close_all()
+
+
+def start_job(name, func, *args):
+    """Запускает func(*args, progress=...) в фоне и возвращает id задачи."""
+    job_id = uuid.uuid4().hex
+    progress = Progress(job_id, name)
+    if settings.JOBS_EAGER:
+        run(progress, func, args)
+    else:
+        executor.submit(run_in_thread, progress, func, args)
+    return job_id
@@ -0,0 +1,97 @@
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+from .access import access_counter
+from .staticfiles import preferred_encoding
+
+try:
+    import brotli
+except ImportError:  # без brotli ответы сжимаются только gzip
+    brotli = None
+
+re_compressible = re.compile(r'^(text/|application/(json|javascript|xml))')
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=settings.COMPRESS_BROTLI_QUALITY)
+    for item in sequence:
+        # flush после каждого куска, чтобы потоковый ответ не буферизовался
+        yield compressor.process(item) + compressor.flush()
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжимает ответы brotli или gzip в зависимости от Accept-Encoding.
+
+    Работает как django.middleware.gzip.GZipMiddleware, но умеет brotli,
+    пропускает ответы короче settings.COMPRESS_MIN_SIZE и сжимает
+    потоковые ответы по кускам, не собирая их в памяти.
+    """
+
+    def process_response(self, request, response):
+        if (
+            response.has_header('Content-Encoding')
+            or not re_compressible.match(response.get('Content-Type', ''))
+        ):
+            return response
+        if not response.streaming and (
+            len(response.content) < settings.COMPRESS_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = preferred_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+            ('br', 'gzip') if brotli is not None else ('gzip',)
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if encoding == 'br':
+                response.streaming_content = brotli_sequence(
+                    response.streaming_content
+                )
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content
+                )
+            del response['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(
+                    response.content, quality=settings.COMPRESS_BROTLI_QUALITY
+                )
+            else:
+                compressed = compress_string(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class AccessCounterMiddleware(MiddlewareMixin):
+    """Считает обращения к views из settings.ACCESS_COUNTED_VIEWS.
+
+    Ключ обращения - значение аргумента view, указанного в настройке;
+    запросы прогрева кэша (заголовок X-Cache-Warmer) не считаются.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        if (
+            view_name in settings.ACCESS_COUNTED_VIEWS
+            and 'HTTP_X_CACHE_WARMER' not in request.META
+        ):
+            argument = settings.ACCESS_COUNTED_VIEWS[view_name]
+            access_counter.record(view_name, view_kwargs.get(argument, ''))
@@ -0,0 +1,55 @@
+import re
+from functools import wraps
+
+from django.conf import settings
+
+# содержимое этих тегов чувствительно к пробелам
+re_protected = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.DOTALL | re.IGNORECASE
+)
+re_newlines = re.compile(r'[ \t\r\f\v]*\n\s*')
+re_spaces = re.compile(r'[ \t\r\f\v]{2,}')
+
+
+def minify_html(html):
+    """Схлопывает отступы и пустые строки шаблонов.
+
+    Браузер всё равно отображает любую последовательность пробельных
+    символов как один пробел, поэтому она заменяется одним символом;
+    pre, textarea, script и style не трогаются.
+    """
+    parts = re_protected.split(html)
+    # split возвращает [текст, блок, имя тега, текст, блок, имя тега, ...]
+    result = []
+    for i in range(0, len(parts), 3):
+        text = re_newlines.sub('\n', parts[i])
+        result.append(re_spaces.sub(' ', text))
+        if i + 1 < len(parts):
+            result.append(parts[i + 1])
+    return ''.join(result)
+
+
+def minified(view_func):
+    """Минифицирует HTML-ответ view.
+
+    Стоит под core.pagecache.public_cache, поэтому страница гостя
+    минифицируется один раз на запись в кэш, а не на каждый запрос.
+    Страницу пользователя целиком не трогает: она отрисовывается на
+    каждый запрос, а её список постов минифицируется при записи в кэш
+    фрагментов (posts.utils.render_with_fragment).
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        if (
+            settings.HTML_MINIFY
+            and getattr(request, 'fragment_cache', None) is None
+            and not response.streaming
+            and response.status_code == 200
+            and response.get('Content-Type', '').startswith('text/html')
+        ):
+            response.content = minify_html(
+                response.content.decode(response.charset)
+            )
+        return response
+    return wrapper
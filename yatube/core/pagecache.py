@@ -0,0 +1,84 @@
+"""Кэш публичных страниц отдельно для гостей и пользователей.
+
+Гость получает страницу целиком из кэша: она не зависит от cookies, и
+в отличие от cache_page ключ не различается по заголовку Cookie.
+Страница пользователя содержит его шапку и вкладки, поэтому из кэша
+берётся только фрагмент со списком постов, а оболочка отрисовывается
+на каждый запрос (см. posts.utils.render_listing).
+
+Попадания и промахи считаются core.access отдельно для каждого класса
+пользователей; посмотреть их можно командой page_cache_stats.
+"""
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+
+from .access import access_counter
+
+ANONYMOUS, AUTHENTICATED = 'anonymous', 'authenticated'
+
+
+def stats_kind(user_class):
+    return f'pagecache:{user_class}'
+
+
+def record(user_class, hit):
+    access_counter.record(stats_kind(user_class), 'hit' if hit else 'miss')
+
+
+def page_key(prefix, user_class, request):
+    url = request.build_absolute_uri().encode()
+    return f'{prefix}:{user_class}:{hashlib.md5(url).hexdigest()}'
+
+
+class FragmentCache:
+    """Кэш фрагмента страницы пользователя; лежит в request.fragment_cache.
+
+    get() учитывает попадание или промах в статистике.
+    """
+
+    def __init__(self, key, timeout):
+        self.key = key
+        self.timeout = timeout
+
+    def get(self):
+        fragment = cache.get(self.key)
+        record(AUTHENTICATED, fragment is not None)
+        return fragment
+
+    def set(self, fragment):
+        cache.set(self.key, fragment, self.timeout)
+
+
+def public_cache(timeout, key_prefix):
+    """Кэширует страницу гостя целиком, а у пользователя - список постов."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            if request.user.is_authenticated:
+                request.fragment_cache = FragmentCache(
+                    page_key(key_prefix, AUTHENTICATED, request), timeout
+                )
+                return view_func(request, *args, **kwargs)
+            key = page_key(key_prefix, ANONYMOUS, request)
+            response = cache.get(key)
+            record(ANONYMOUS, response is not None)
+            if response is not None:
+                return response
+            # страница пишется в кэш целиком, поэтому потоком не отдаётся
+            request.cache_whole_page = True
+            response = view_func(request, *args, **kwargs)
+            # ответ с cookies (например, csrftoken) общим быть не может
+            if (
+                response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+                and not request.META.get('CSRF_COOKIE_USED')
+            ):
+                cache.set(key, response, timeout)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,56 @@
+"""Paginator для админки с оценкой числа строк вместо COUNT(*).
+
+На большой таблице точный COUNT(*) читает её целиком, а странице
+списка без фильтров достаточно приблизительного числа. Оценка берётся
+из статистики базы; если таблица маленькая или список отфильтрован,
+строки считаются как обычно.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimate_count(model, using):
+    """Приблизительное число строк таблицы или None."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s', [table]
+            )
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s',
+                [table]
+            )
+        elif connection.vendor == 'sqlite':
+            # rowid идёт по порядку вставки: MIN и MAX берутся из B-дерева
+            # без обхода таблицы, удалённые строки завышают оценку
+            cursor.execute(
+                'SELECT MAX(rowid) - MIN(rowid) + 1 FROM '
+                + connection.ops.quote_name(table)
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        # фильтры и поиск добавляют условие WHERE
+        if not queryset.query.where:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if (
+                estimate is not None
+                and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD
+            ):
+                return estimate
+        return super().count
@@ -0,0 +1,294 @@
+"""WSGI-обёртки, отдающие статику и медиафайлы в обход Django.
+
+Файлы с хэшем в имени (их создаёт ManifestStaticFilesStorage),
+картинки из core.storage.ContentAddressedStorage и миниатюры
+sorl-thumbnail, чьё имя зависит от содержимого, получают
+``Cache-Control: immutable`` на год. Если клиент принимает сжатие,
+отдаётся готовый вариант .br или .gz. Тело ответа передаётся через
+``wsgi.file_wrapper``: gunicorn и uWSGI отправляют его через sendfile
+без копирования в Python.
+"""
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+
+from .storage import ContentAddressedStorage
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+BYTES_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+BLOCK_SIZE = 64 * 1024
+
+
+def accepted_encodings(header):
+    """Словарь кодировка -> q из заголовка Accept-Encoding."""
+    qualities = {}
+    for part in header.split(','):
+        name, *params = part.split(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+    return qualities
+
+
+def preferred_encoding(header, encodings):
+    """Кодировка из encodings с наибольшим q > 0 или None.
+
+    При равных q выигрывает та, что раньше в encodings; '*' задаёт q
+    для не перечисленных кодировок.
+    """
+    qualities = accepted_encodings(header)
+    best, best_quality = None, 0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def etag_matches(header, etag):
+    """Есть ли etag в списке If-None-Match.
+
+    Сравнение слабое, как требует RFC 7232 для If-None-Match: префикс
+    W/ не учитывается, поэтому подходит и ETag, ослабленный сжатием.
+    """
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag == '*' or tag.replace('W/', '', 1) == etag:
+            return True
+    return False
+
+
+class StaticFile:
+    __slots__ = ('path', 'mtime', 'size', 'headers', 'variants')
+
+    def __init__(self, path, cache_control, compressed=True):
+        self.path = path
+        content_type = mimetypes.guess_type(path)[0]
+        stat = os.stat(path)
+        self.mtime = int(stat.st_mtime)
+        self.size = stat.st_size
+        # ETag зависит от варианта и добавляется к ответу в serve()
+        self.headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Last-Modified', formatdate(self.mtime, usegmt=True)),
+            ('Cache-Control', cache_control),
+            ('Accept-Ranges', 'bytes'),
+        ]
+        # (кодировка, путь, размер); последний элемент - без сжатия
+        self.variants = [
+            (encoding, path + suffix, os.path.getsize(path + suffix))
+            for encoding, suffix in ENCODINGS
+            if compressed and os.path.isfile(path + suffix)
+        ]
+        if self.variants:
+            self.headers.append(('Vary', 'Accept-Encoding'))
+        self.variants.append((None, path, self.size))
+
+    def etag(self, encoding=None):
+        """ETag варианта: у сжатых вариантов свой, с суффиксом кодировки."""
+        tag = f'{self.mtime:x}-{self.size:x}'
+        if encoding:
+            tag += f'-{encoding}'
+        return f'"{tag}"'
+
+    def not_modified(self, environ, etag):
+        if 'HTTP_IF_NONE_MATCH' in environ:
+            return etag_matches(environ['HTTP_IF_NONE_MATCH'], etag)
+        try:
+            since = parsedate_to_datetime(environ['HTTP_IF_MODIFIED_SINCE'])
+        except (KeyError, TypeError, ValueError):
+            return False
+        return self.mtime <= since.timestamp()
+
+    def choose(self, accept_encoding):
+        preferred = preferred_encoding(accept_encoding, [
+            encoding for encoding, _, _ in self.variants if encoding
+        ])
+        for encoding, path, size in self.variants:
+            if encoding == preferred:
+                return encoding, path, size
+
+    def byte_range(self, environ):
+        """(start, end) из заголовка Range, None - весь файл, False - 416."""
+        match = BYTES_RANGE.match(environ.get('HTTP_RANGE', ''))
+        if not match or environ.get('HTTP_IF_RANGE', self.etag()) != (
+            self.etag()
+        ):
+            return None
+        start, end = match.groups()
+        if not start:
+            if not end:
+                return None
+            start, end = max(self.size - int(end), 0), self.size - 1
+        else:
+            start = int(start)
+            end = min(int(end), self.size - 1) if end else self.size - 1
+        if start > end:
+            return False
+        return start, end
+
+
+class RangeFile:
+    """Файл, из которого читается не больше ``length`` байт.
+
+    fileno() оставлен, чтобы сервер мог отправить диапазон через
+    sendfile: позиция дескриптора уже выставлена на начало диапазона,
+    а длину он берёт из Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+class StaticFilesMiddleware:
+    compressed = True
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        root = root or settings.STATIC_ROOT
+        self.root = os.path.abspath(root) if root else None
+        self.prefix = prefix or settings.STATIC_URL
+        self.files = {}
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if (
+            self.root is None
+            or not path.startswith(self.prefix)
+            or environ['REQUEST_METHOD'] not in ('GET', 'HEAD')
+        ):
+            return self.application(environ, start_response)
+        static_file = self.find(path)
+        if static_file is None:
+            return self.application(environ, start_response)
+        return self.serve(static_file, environ, start_response)
+
+    def cache_control(self, name):
+        return IMMUTABLE if HASHED_NAME.search(name) else 'public, max-age=60'
+
+    def resolve(self, url):
+        name = url[len(self.prefix):]
+        path = os.path.normpath(os.path.join(self.root, name))
+        if path.startswith(self.root + os.sep) and os.path.isfile(path):
+            return name, path
+        return None, None
+
+    def find(self, url):
+        # статика не меняется между деплоями, поэтому stat кэшируется
+        if url not in self.files:
+            name, path = self.resolve(url)
+            if path is None:
+                return None
+            self.files[url] = StaticFile(
+                path, self.cache_control(name), self.compressed
+            )
+        return self.files[url]
+
+    def serve(self, static_file, environ, start_response):
+        encoding, path, size = static_file.choose(
+            environ.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        headers = static_file.headers + [('ETag', static_file.etag(encoding))]
+        if static_file.not_modified(environ, headers[-1][1]):
+            start_response('304 Not Modified', headers)
+            return []
+        status = '200 OK'
+        byte_range = None if encoding else static_file.byte_range(environ)
+        if byte_range is False:
+            headers.append(('Content-Range', f'bytes */{size}'))
+            start_response('416 Range Not Satisfiable', headers)
+            return []
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        if byte_range:
+            start, end = byte_range
+            status, size = '206 Partial Content', end - start + 1
+            headers.append(('Content-Range', f'bytes {start}-{end}/'
+                                             f'{static_file.size}'))
+        headers.append(('Content-Length', str(size)))
+        start_response(status, headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file = open(path, 'rb')
+        if byte_range:
+            file = RangeFile(file, byte_range[0], size)
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(file, BLOCK_SIZE)
+
+
+class MediaFilesMiddleware(StaticFilesMiddleware):
+    """Раздаёт MEDIA_URL: сама или через фронтенд-прокси.
+
+    При settings.MEDIA_SENDFILE = 'nginx' ответ содержит только
+    X-Accel-Redirect на внутренний location MEDIA_ACCEL_REDIRECT_PREFIX,
+    при 'apache' - X-Sendfile с путём к файлу; Range и условные запросы
+    в этом случае обрабатывает прокси.
+    """
+    compressed = False
+
+    def __init__(self, application, root=None, prefix=None):
+        super().__init__(
+            application,
+            root or settings.MEDIA_ROOT,
+            prefix or settings.MEDIA_URL,
+        )
+        self.thumbnail_prefix = getattr(
+            settings, 'THUMBNAIL_PREFIX', 'cache/'
+        )
+
+    def cache_control(self, name):
+        if name.startswith(self.thumbnail_prefix) or (
+            ContentAddressedStorage.CONTENT_NAME.search(name)
+        ):
+            return IMMUTABLE
+        return 'public, max-age=86400'
+
+    def find(self, url):
+        # загрузки появляются и удаляются во время работы, stat не кэшируем
+        name, path = self.resolve(url)
+        if path is None:
+            return None
+        return StaticFile(path, self.cache_control(name), self.compressed)
+
+    def serve(self, static_file, environ, start_response):
+        if settings.MEDIA_SENDFILE is None:
+            return super().serve(static_file, environ, start_response)
+        headers = static_file.headers[:3] + [('ETag', static_file.etag())]
+        if settings.MEDIA_SENDFILE == 'nginx':
+            name = os.path.relpath(static_file.path, self.root)
+            location = settings.MEDIA_ACCEL_REDIRECT_PREFIX + name
+            headers.append(('X-Accel-Redirect', location.replace(os.sep, '/')))
+        else:
+            headers.append(('X-Sendfile', static_file.path))
+        start_response('200 OK', headers)
+        return []
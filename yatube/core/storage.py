@@ -0,0 +1,108 @@
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него создаются только .gz
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.txt', '.html', '.xml', '.json', '.map', '.ico',
+)
+
+
+def compress_file(path):
+    """Создаёт рядом с файлом .gz и .br, если они меньше оригинала."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хэширует имена файлов и заранее сжимает текстовые ресурсы.
+
+    Сжатые варианты создаются на шаге post_process в collectstatic и
+    отдаются core.staticfiles.StaticFilesMiddleware без сжатия на лету.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed_names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name:
+                processed_names.update((name, hashed_name))
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(processed_names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                compress_file(self.path(name))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит загрузки под именем из SHA-256 содержимого.
+
+    Файл ``posts/photo.jpg`` сохраняется как ``posts/ab/cd/<хэш>.jpg``:
+    в каталоге не больше 256 подкаталогов, а одинаковые загрузки
+    становятся одним файлом. Содержимое пишется во временный файл того
+    же каталога и переименовывается, поэтому читатель никогда не видит
+    недописанный файл.
+
+    Один файл может принадлежать нескольким объектам, поэтому удалять
+    его через delete() можно, только если на имя больше никто не
+    ссылается.
+    """
+    CONTENT_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}')
+
+    def is_content_name(self, name):
+        return bool(self.CONTENT_NAME.search(name))
+
+    def content_name(self, name, digest):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return '/'.join(filter(None, (
+            directory, digest[:2], digest[2:4], digest + extension
+        )))
+
+    def get_available_name(self, name, max_length=None):
+        # одинаковое имя - одинаковое содержимое, суффиксы не нужны
+        return name
+
+    def _save(self, name, content):
+        directory = self.path(os.path.dirname(name))
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            name = self.content_name(name, digest.hexdigest())
+            path = self.path(name)
+            if os.path.exists(path):
+                os.remove(temp_path)
+                return name
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.chmod(temp_path, self.file_permissions_mode or 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
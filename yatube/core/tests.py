@@ -0,0 +1,348 @@
+import asyncio
+import gzip
+import os
+import shutil
+import tempfile
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, override_settings
+)
+
+from .access import AccessCounter
+from .asgi import AsgiHandler
+from .middleware import CompressionMiddleware, brotli
+from .minify import minify_html
+from .staticfiles import (
+    MediaFilesMiddleware, StaticFilesMiddleware, preferred_encoding
+)
+from .storage import ContentAddressedStorage
+
+TEMP_STATIC_DIR = tempfile.mkdtemp(dir=settings.TEST_DIR)
+STATIC_SOURCE = os.path.join(TEMP_STATIC_DIR, 'source')
+STATIC_ROOT = os.path.join(TEMP_STATIC_DIR, 'root')
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.TEST_DIR)
+
+
+class SqlitePragmasTest(TestCase):
+    def test_pragmas_applied_on_connect(self):
+        """PRAGMA из настроек применяются к подключению."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+
+@override_settings(
+    STATICFILES_DIRS=[STATIC_SOURCE],
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_STORAGE='core.storage.CompressedManifestStaticFilesStorage',
+)
+class StaticPipelineTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(STATIC_SOURCE, 'css'))
+        with open(os.path.join(STATIC_SOURCE, 'css', 'site.css'), 'w') as f:
+            f.write('body { margin: 0; }\n' * 100)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        from django.contrib.staticfiles.storage import staticfiles_storage
+        cls.url = staticfiles_storage.url('css/site.css')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_DIR, ignore_errors=True)
+
+    def request(self, url, **environ):
+        def start_response(status, headers):
+            self.status = status
+            self.headers = dict(headers)
+
+        app = StaticFilesMiddleware(lambda env, sr: [b'django'])
+        environ.setdefault('REQUEST_METHOD', 'GET')
+        return b''.join(app(dict(environ, PATH_INFO=url), start_response))
+
+    def test_hashed_file_compressed_and_immutable(self):
+        """Хэшированный файл отдаётся сжатым с immutable-кэшированием."""
+        body = self.request(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertRegex(self.url, r'site\.[0-9a-f]{12}\.css$')
+        self.assertEqual(self.headers['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', self.headers['Cache-Control'])
+        self.assertEqual(len(body), int(self.headers['Content-Length']))
+
+    def test_encoding_with_zero_quality_refused(self):
+        """Кодировка с q=0 не выбирается, даже если она упомянута."""
+        self.request(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0, br;q=0')
+        self.assertNotIn('Content-Encoding', self.headers)
+        self.request(self.url, HTTP_ACCEPT_ENCODING='gzip;q=0.5, *;q=0')
+        self.assertEqual(self.headers['Content-Encoding'], 'gzip')
+
+    def test_not_modified_and_fallthrough(self):
+        """ETag даёт 304, а неизвестные пути уходят в Django."""
+        self.request(self.url)
+        etag = self.headers['ETag']
+        self.request(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertTrue(self.status.startswith('304'))
+        body = self.request(settings.STATIC_URL + '../settings.py')
+        self.assertEqual(body, b'django')
+
+    def test_etag_per_encoding(self):
+        """У сжатого варианта свой ETag; If-None-Match - список слабых."""
+        self.request(self.url)
+        identity = self.headers['ETag']
+        self.request(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        gzipped = self.headers['ETag']
+        self.assertNotEqual(gzipped, identity)
+        self.request(self.url, HTTP_IF_NONE_MATCH=gzipped)
+        self.assertTrue(self.status.startswith('200'))
+        self.request(self.url, HTTP_ACCEPT_ENCODING='gzip',
+                     HTTP_IF_NONE_MATCH=f'"other", W/{gzipped}')
+        self.assertTrue(self.status.startswith('304'))
+        self.assertEqual(self.headers['ETag'], gzipped)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, MEDIA_SENDFILE=None)
+class MediaFilesTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'cache'))
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'cache', 'ab.jpg'), 'wb') as f:
+            f.write(bytes(range(100)))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def request(self, **environ):
+        def start_response(status, headers):
+            self.status = status
+            self.headers = dict(headers)
+
+        app = MediaFilesMiddleware(lambda env, sr: [b'django'])
+        environ.update(REQUEST_METHOD='GET', PATH_INFO='/media/cache/ab.jpg')
+        return b''.join(app(environ, start_response))
+
+    def test_range_request(self):
+        """Range отдаёт только запрошенные байты."""
+        body = self.request(HTTP_RANGE='bytes=10-19')
+        self.assertTrue(self.status.startswith('206'))
+        self.assertEqual(body, bytes(range(10, 20)))
+        self.assertEqual(self.headers['Content-Range'], 'bytes 10-19/100')
+        self.request(HTTP_RANGE='bytes=200-')
+        self.assertTrue(self.status.startswith('416'))
+
+    def test_thumbnail_cached_and_not_modified(self):
+        """Миниатюры кэшируются надолго, If-Modified-Since даёт 304."""
+        self.request()
+        self.assertIn('immutable', self.headers['Cache-Control'])
+        self.request(HTTP_IF_MODIFIED_SINCE=self.headers['Last-Modified'])
+        self.assertTrue(self.status.startswith('304'))
+
+    @override_settings(MEDIA_SENDFILE='nginx')
+    def test_accel_redirect(self):
+        """В режиме nginx тело отдаёт прокси по X-Accel-Redirect."""
+        body = self.request()
+        self.assertEqual(body, b'')
+        self.assertEqual(
+            self.headers['X-Accel-Redirect'], '/protected-media/cache/ab.jpg'
+        )
+
+
+class ContentAddressedStorageTest(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(dir=settings.TEST_DIR)
+        self.storage = ContentAddressedStorage(location=self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_sharded_name_and_deduplication(self):
+        """Имя берётся из хэша, одинаковые загрузки - один файл."""
+        name = self.storage.save('posts/photo.JPG', ContentFile(b'data'))
+        digest = (
+            '3a6eb0790f39ac87c94f3856b2dd2c5d110e6811602261a9a923d3bb23adc8b7'
+        )
+        self.assertEqual(name, f'posts/3a/6e/{digest}.jpg')
+        self.assertTrue(self.storage.is_content_name(name))
+        self.assertEqual(
+            self.storage.save('posts/copy.jpg', ContentFile(b'data')), name
+        )
+        self.assertEqual(
+            os.listdir(os.path.join(self.root, 'posts')), ['3a']
+        )
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b'data')
+
+    def test_failed_write_leaves_no_files(self):
+        """Оборванная запись не оставляет файлов."""
+        class BrokenFile(ContentFile):
+            def chunks(self, chunk_size=None):
+                yield b'part'
+                raise OSError('обрыв')
+
+        with self.assertRaises(OSError):
+            self.storage.save('posts/broken.jpg', BrokenFile(b''))
+        self.assertEqual(os.listdir(os.path.join(self.root, 'posts')), [])
+
+
+class CompressionTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = CompressionMiddleware()
+
+    def test_gzip_large_response_only(self):
+        """Сжимаются только ответы длиннее COMPRESS_MIN_SIZE."""
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = self.middleware.process_response(
+            request, HttpResponse('<p>текст</p>' * 200)
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        response = self.middleware.process_response(
+            request, HttpResponse('<p>текст</p>')
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_preferred_encoding(self):
+        """Выбирается кодировка с наибольшим q > 0."""
+        encodings = ('br', 'gzip')
+        cases = {
+            'gzip, deflate, br': 'br',
+            'br;q=0, gzip': 'gzip',
+            'br;q=0.5, gzip;q=0.8': 'gzip',
+            'GZIP ; Q=0.1': 'gzip',
+            'gzip;q=0': None,
+            '*': 'br',
+            '*;q=0, gzip': 'gzip',
+            'identity': None,
+            '': None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(
+                    preferred_encoding(header, encodings), expected
+                )
+
+    def test_zero_quality_not_compressed(self):
+        """Ответ не сжимается, если клиент запретил gzip через q=0."""
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        response = self.middleware.process_response(
+            request, HttpResponse('<p>текст</p>' * 200)
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_response(self):
+        """Потоковый ответ сжимается по кускам."""
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = self.middleware.process_response(
+            request, StreamingHttpResponse(iter([b'<p>a</p>'] * 10))
+        )
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(content, b'<p>a</p>' * 10)
+
+    @skipUnless(brotli, 'brotli не установлен')
+    def test_brotli_preferred(self):
+        """brotli выбирается раньше gzip и сжимает ответ целиком."""
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+        response = self.middleware.process_response(
+            request, HttpResponse('<p>текст</p>' * 200)
+        )
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(
+            brotli.decompress(response.content).decode(), '<p>текст</p>' * 200
+        )
+        self.assertEqual(
+            response['Content-Length'], str(len(response.content))
+        )
+
+    @skipUnless(brotli, 'brotli не установлен')
+    def test_brotli_streaming_response(self):
+        """Потоковый ответ сжимается brotli по кускам."""
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='br')
+        response = self.middleware.process_response(
+            request, StreamingHttpResponse(iter([b'<p>a</p>'] * 10))
+        )
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(
+            brotli.decompress(b''.join(chunks)), b'<p>a</p>' * 10
+        )
+
+    def test_minify_keeps_preformatted(self):
+        """Минификация не трогает содержимое pre и textarea."""
+        html = '<ul>\n    <li>a   b</li>\n\n  </ul><pre>  x\n\n  y</pre>'
+        self.assertEqual(
+            minify_html(html), '<ul>\n<li>a b</li>\n</ul><pre>  x\n\n  y</pre>'
+        )
+
+
+class AsgiHandlerTest(SimpleTestCase):
+    def test_wsgi_application_served_over_asgi(self):
+        """Тело запроса доходит до приложения, ответ уходит по кускам."""
+        def application(environ, start_response):
+            start_response('201 Created', [('X-Path', environ['PATH_INFO'])])
+            return [environ['wsgi.input'].read(), b'', b'!']
+
+        messages = [
+            {'type': 'http.request', 'body': b'hello ', 'more_body': True},
+            {'type': 'http.request', 'body': b'world'},
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'POST', 'path': '/путь/'}
+        asyncio.run(AsgiHandler(application, max_workers=1)(
+            scope, receive, send
+        ))
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertEqual(
+            sent[0]['headers'], [(b'x-path', '/путь/'.encode())]
+        )
+        self.assertEqual(
+            b''.join(message.get('body', b'') for message in sent[1:]),
+            b'hello world!'
+        )
+        self.assertFalse(sent[-1].get('more_body'))
+
+    def test_repeated_headers(self):
+        """Повторные cookie склеиваются через '; ', прочие - через ','."""
+        scope = {'type': 'http', 'method': 'GET', 'path': '/', 'headers': [
+            (b'cookie', b'sessionid=1'), (b'cookie', b'csrftoken=2'),
+            (b'accept', b'text/html'), (b'accept', b'*/*'),
+        ]}
+        environ = AsgiHandler(None, max_workers=1).environ(scope, None)
+        self.assertEqual(environ['HTTP_COOKIE'], 'sessionid=1; csrftoken=2')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+
+
+class AccessCounterTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_top_after_flush(self):
+        """Счётчик возвращает самые частые ключи после сброса в кэш."""
+        counter = AccessCounter()
+        for key, hits in (('a', 1), ('b', 3), ('c', 2)):
+            for _ in range(hits):
+                counter.record('posts:posts', key)
+        self.assertEqual(counter.top('posts:posts', 2), [])
+        counter.flush()
+        counter.record('posts:posts', 'a')
+        counter.record('posts:posts', 'a')
+        counter.flush()
+        self.assertEqual(counter.top('posts:posts', 2), ['a', 'b'])
@@ -0,0 +1,93 @@
+"""Ограничение частоты запросов к изменяющим данные страницам.
+
+Счётчики хранятся в настроенном кэше и обновляются атомарным ``incr``,
+поэтому лимит общий для всех воркеров, если кэш общий (memcached, redis).
+Используется скользящее окно: к счётчику текущего окна добавляется
+доля счётчика предыдущего, пропорциональная оставшемуся времени.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)."""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+def get_ident(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    ip = request.META.get(settings.THROTTLE_IP_HEADER) or (
+        request.META.get('REMOTE_ADDR', '')
+    )
+    return f'ip:{ip.split(",")[0].strip()}'
+
+
+class SlidingWindow:
+    def __init__(self, scope, rate):
+        self.scope = scope
+        self.num, self.period = parse_rate(rate)
+
+    def key(self, ident, window):
+        return f'throttle:{self.scope}:{ident}:{window}'
+
+    def hit(self, ident, now=None):
+        """Учитывает запрос; возвращает 0 или число секунд до Retry-After."""
+        now = time.time() if now is None else now
+        window, elapsed = divmod(now, self.period)
+        window = int(window)
+        key = self.key(ident, window)
+        if cache.add(key, 1, self.period * 2):
+            current = 1
+        else:
+            try:
+                current = cache.incr(key)
+            except ValueError:
+                # ключ успел истечь между add и incr
+                cache.set(key, 1, self.period * 2)
+                current = 1
+        previous = cache.get(self.key(ident, window - 1), 0)
+        weight = 1 - elapsed / self.period
+        if previous * weight + current <= self.num:
+            return 0
+        if current > self.num:
+            return math.ceil(self.period - elapsed) or 1
+        # ждём, пока доля предыдущего окна не уменьшится достаточно
+        wait = self.period * (1 - (self.num - current) / previous) - elapsed
+        return max(math.ceil(wait), 1)
+
+
+def throttle(scope, rate, methods=('POST',)):
+    """Декоратор view: не больше ``rate`` запросов на пользователя или IP.
+
+    Лимит можно переопределить в ``settings.THROTTLE_RATES[scope]``.
+    ``methods=None`` ограничивает запросы любым методом.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if settings.THROTTLE_ENABLED and (
+                methods is None or request.method in methods
+            ):
+                limiter = SlidingWindow(
+                    scope, settings.THROTTLE_RATES.get(scope, rate)
+                )
+                retry_after = limiter.hit(get_ident(request))
+                if retry_after:
+                    response = render(
+                        request, 'core/429.html',
+                        {'retry_after': retry_after}, status=429
+                    )
+                    response['Retry-After'] = str(retry_after)
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,5 +1,20 @@
+from django import forms
 from django.contrib import admin
-from .models import Post, Group, Comment, Follow
+from django.http import Http404, JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+
+from core.jobs import job_status, start_job
+from core.paginator import EstimatedCountPaginator
+
+from . import bulk
+from .models import ArchivedPost, Post, Group, Comment, Follow
+
+
+class MoveToGroupForm(forms.Form):
+    group = forms.ModelChoiceField(
+        queryset=Group.objects.all(), label='Группа'
+    )
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,10 +25,114 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'group',
     )
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    # поля с поиском вместо <select> со всеми авторами и группами; группа
+    # не редактируется в списке: каждая строка читала бы её отдельно
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
+    # фильтр по дате - диапазон по индексу pub_date; date_hierarchy не
+    # подходит: её ссылки по годам читают DISTINCT по всей таблице
     list_filter = ('pub_date',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
+    actions = (
+        'move_to_group', 'delete_posts', 'delete_by_author', 'purge_comments'
+    )
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # стандартное удаление загружает каждый пост и шлёт его сигналы
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_urls(self):
+        return [
+            path(
+                'jobs/<str:job_id>/',
+                self.admin_site.admin_view(self.job_view),
+                name='posts_post_job',
+            ),
+        ] + super().get_urls()
+
+    def job_view(self, request, job_id):
+        status = job_status(job_id)
+        if status is None:
+            raise Http404
+        return JsonResponse(status)
+
+    def run_in_background(self, request, name, func, *args):
+        job_id = start_job(name, func, *args)
+        url = reverse('admin:posts_post_job', args=[job_id])
+        self.message_user(request, f'Задача «{name}» запущена: {url}')
+
+    def confirm(self, request, queryset, description, form=None):
+        return TemplateResponse(request, 'admin/posts/bulk_action.html', {
+            **self.admin_site.each_context(request),
+            'title': description,
+            'description': description,
+            'form': form,
+            'count': queryset.count(),
+            'selected': request.POST.getlist(admin.ACTION_CHECKBOX_NAME),
+            'action': request.POST['action'],
+            'select_across': request.POST.get('select_across', '0'),
+        })
+
+    def move_to_group(self, request, queryset):
+        form = MoveToGroupForm(request.POST if 'confirm' in request.POST
+                               else None)
+        if not form.is_valid():
+            return self.confirm(request, queryset,
+                                'Перенести посты в группу', form)
+        self.run_in_background(
+            request, 'Перенос в группу', bulk.move_to_group,
+            queryset, form.cleaned_data['group'].pk
+        )
+    move_to_group.short_description = 'Перенести в группу'
+
+    def delete_posts(self, request, queryset):
+        if 'confirm' not in request.POST:
+            return self.confirm(request, queryset, 'Удалить выбранные посты')
+        self.run_in_background(
+            request, 'Удаление постов', bulk.delete_posts, queryset
+        )
+    delete_posts.short_description = 'Удалить выбранные посты'
+
+    def delete_by_author(self, request, queryset):
+        if 'confirm' not in request.POST:
+            return self.confirm(
+                request, queryset, 'Удалить все посты авторов выбранных'
+            )
+        author_ids = set(queryset.values_list('author_id', flat=True))
+        self.run_in_background(
+            request, 'Удаление постов авторов', bulk.delete_by_author,
+            author_ids
+        )
+    delete_by_author.short_description = 'Удалить все посты их авторов'
+
+    def purge_comments(self, request, queryset):
+        if 'confirm' not in request.POST:
+            return self.confirm(
+                request, queryset, 'Удалить комментарии к выбранным постам'
+            )
+        self.run_in_background(
+            request, 'Удаление комментариев', bulk.purge_comments, queryset
+        )
+    purge_comments.short_description = 'Удалить комментарии'
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+
+
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'post', 'author', 'created')
+    list_select_related = ('post', 'author')
+    raw_id_fields = ('post', 'author')
+    search_fields = ('text',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class FollowAdmin(admin.ModelAdmin):
@@ -22,11 +141,28 @@ class FollowAdmin(admin.ModelAdmin):
         'user',
         'author',
     )
-    search_fields = ('user', 'author')
-    list_filter = ('user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class ArchivedPostAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author', 'group')
+    search_fields = ('text',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        # в архив посты попадают только командой archive_posts
+        return False
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(ArchivedPost, ArchivedPostAdmin)
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Follow, FollowAdmin)
-admin.site.register(Comment)
+admin.site.register(Comment, CommentAdmin)
@@ -0,0 +1,70 @@
+"""Перенос старых постов в архивные таблицы.
+
+Почти все запросы читают посты последних недель, а таблица posts_post
+и её индексы растут вместе со всей историей. Команда archive_posts
+переносит посты старше settings.ARCHIVE_AFTER_DAYS вместе с
+комментариями в ArchivedPost и ArchivedComment той же базы, пачками по
+settings.BULK_BATCH_SIZE. id сохраняются, поэтому post_detail находит
+архивный пост по старой ссылке, а списки постов продолжаются архивом
+после последней страницы рабочей таблицы (posts.utils.PartitionedPosts).
+
+Архивные посты только читаются: их нельзя редактировать и
+комментировать.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import counts
+from .bulk import batches, invalidate, post_rows, raw_delete
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'author_id', 'group_id', 'image',
+    'image_color', 'hot_score'
+)
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+def archive_cutoff(days=None):
+    if days is None:
+        days = settings.ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def copy_batch(ids):
+    ArchivedPost.objects.bulk_create(
+        ArchivedPost(**values)
+        for values in Post.objects.filter(pk__in=ids).values(*POST_FIELDS)
+    )
+    ArchivedComment.objects.bulk_create(
+        ArchivedComment(**values)
+        for values in Comment.objects.filter(
+            post_id__in=ids
+        ).values(*COMMENT_FIELDS)
+    )
+
+
+def archive_posts(cutoff, progress):
+    """Переносит в архив посты, опубликованные раньше cutoff."""
+    ids = list(Post.objects.filter(pub_date__lt=cutoff).order_by(
+        'pk'
+    ).values_list('pk', flat=True))
+    progress(0, len(ids))
+    for done, batch in batches(ids):
+        rows = post_rows(batch)
+        with transaction.atomic():
+            copy_batch(batch)
+            raw_delete(batch)
+        invalidate(rows)
+        counts.drop_counts(
+            'author', *{author_id for _, author_id, _ in rows},
+            model=ArchivedPost
+        )
+        counts.drop_counts(
+            'group', *{group_id for _, _, group_id in rows if group_id},
+            model=ArchivedPost
+        )
+        progress(done)
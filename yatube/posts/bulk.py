@@ -0,0 +1,105 @@
+"""Массовые операции над постами для действий админки.
+
+Операции идут пачками по settings.BULK_BATCH_SIZE через
+QuerySet.update() и DELETE без загрузки моделей, поэтому сигналы
+posts.signals не отправляются. Вместо них после каждой пачки один раз
+сбрасываются карточки, ленты и счётчики затронутых групп и авторов и
+ключи прокси. Функции принимают progress из core.jobs.
+"""
+from django.conf import settings
+from django.db import models, transaction
+
+from core.edgecache import purge
+
+from . import counts, timelines
+from .edge import LISTING_TAG, author_tag, group_tag, post_tag
+from .models import Comment, Group, Post
+from .post_cache import post_cache
+
+
+def batches(ids):
+    size = settings.BULK_BATCH_SIZE
+    for start in range(0, len(ids), size):
+        yield start + min(size, len(ids) - start), ids[start:start + size]
+
+
+def invalidate(rows, group_ids=()):
+    """Сбрасывает кэши после изменения постов rows (id, автор, группа)."""
+    authors = {author_id for _, author_id, _ in rows}
+    groups = {group_id for _, _, group_id in rows if group_id}
+    groups.update(group_ids)
+    post_cache.invalidate(*(post_id for post_id, _, _ in rows))
+    for author_id in authors:
+        timelines.drop_timeline('author', author_id)
+    for group_id in groups:
+        timelines.drop_timeline('group', group_id)
+    counts.drop_counts('author', *authors)
+    counts.drop_counts('group', *groups)
+    slugs = Group.objects.filter(pk__in=groups).values_list('slug', flat=True)
+    purge(
+        LISTING_TAG,
+        *(post_tag(post_id) for post_id, _, _ in rows),
+        *map(author_tag, authors),
+        *map(group_tag, slugs),
+    )
+
+
+def post_rows(ids):
+    return list(Post.objects.filter(pk__in=ids).values_list(
+        'id', 'author_id', 'group_id'
+    ))
+
+
+def move_to_group(queryset, group_id, progress):
+    ids = list(queryset.values_list('pk', flat=True))
+    progress(0, len(ids))
+    for done, batch in batches(ids):
+        rows = post_rows(batch)
+        Post.objects.filter(pk__in=batch).update(group_id=group_id)
+        invalidate(rows, [group_id])
+        progress(done)
+
+
+def delete_dependents(ids):
+    """Удаляет объекты, которые ссылаются на посты с on_delete=CASCADE."""
+    for relation in Post._meta.related_objects:
+        if relation.on_delete is models.CASCADE:
+            relation.related_model._base_manager.filter(
+                **{f'{relation.field.name}__in': ids}
+            ).delete()
+
+
+def raw_delete(ids):
+    """Удаляет посты ids и зависимые объекты без загрузки и сигналов."""
+    delete_dependents(ids)
+    posts = Post.objects.filter(pk__in=ids)
+    posts._raw_delete(posts.db)
+
+
+def delete_posts(queryset, progress):
+    ids = list(queryset.values_list('pk', flat=True))
+    progress(0, len(ids))
+    for done, batch in batches(ids):
+        rows = post_rows(batch)
+        with transaction.atomic():
+            raw_delete(batch)
+        invalidate(rows)
+        progress(done)
+
+
+def delete_by_author(author_ids, progress):
+    delete_posts(Post.objects.filter(author_id__in=author_ids), progress)
+
+
+def purge_comments(queryset, progress):
+    ids = list(Comment.objects.filter(
+        post__in=queryset.values('pk')
+    ).values_list('pk', flat=True))
+    progress(0, len(ids))
+    for done, batch in batches(ids):
+        post_ids = set(Comment.objects.filter(pk__in=batch).values_list(
+            'post_id', flat=True
+        ))
+        Comment.objects.filter(pk__in=batch).delete()
+        purge(*map(post_tag, post_ids))
+        progress(done)
@@ -0,0 +1,107 @@
+"""Число постов на главной, в группе, у автора и в ленте подписок.
+
+Счётчики лежат в кэше и меняются сигналами posts.signals на +1/-1,
+поэтому страница со списком постов не выполняет SELECT COUNT(*).
+Отсутствующий счётчик считается при первом обращении; для нескольких
+групп или авторов сразу - одним запросом с GROUP BY. Лента подписок
+отдельного счётчика не имеет: это сумма счётчиков авторов.
+
+bulk_create() и QuerySet.update() сигналов не отправляют: счётчики
+затронутых групп и авторов нужно сбросить через drop_counts().
+
+Функции принимают model: архив (ArchivedPost) считается отдельно от
+рабочей таблицы и меняется только командой archive_posts.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Follow, Post
+
+# scope -> поле поста, по которому считаются посты
+SCOPES = {'group': 'group_id', 'author': 'author_id'}
+
+
+def key_prefix(model):
+    return f'count:{model._meta.model_name}'
+
+
+def total_key(model=Post):
+    return f'{key_prefix(model)}:all'
+
+
+def count_key(scope, pk, model=Post):
+    return f'{key_prefix(model)}:{scope}:{pk}'
+
+
+def total_count(model=Post):
+    count = cache.get(total_key(model))
+    if count is None:
+        count = model.objects.count()
+        cache.add(total_key(model), count, settings.COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def scope_counts(scope, pks, model=Post):
+    """Словарь pk -> число постов для нескольких групп или авторов."""
+    keys = {count_key(scope, pk, model): pk for pk in pks}
+    counts = {
+        keys[key]: count for key, count in cache.get_many(keys).items()
+    }
+    missing = [pk for pk in keys.values() if pk not in counts]
+    if missing:
+        field = SCOPES[scope]
+        fetched = dict.fromkeys(missing, 0)
+        fetched.update(
+            model.objects.order_by().filter(**{f'{field}__in': missing})
+            .values_list(field).annotate(Count('id'))
+        )
+        for pk, count in fetched.items():
+            cache.add(count_key(scope, pk, model), count,
+                      settings.COUNT_CACHE_TIMEOUT)
+        counts.update(fetched)
+    return counts
+
+
+def scope_count(scope, pk, model=Post):
+    return scope_counts(scope, [pk], model)[pk]
+
+
+def follow_count(user, model=Post):
+    authors = Follow.objects.filter(user=user).values_list(
+        'author_id', flat=True
+    )
+    return sum(scope_counts('author', authors, model).values())
+
+
+def change_count(key, delta):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # счётчика нет в кэше: его посчитают при следующем обращении
+        pass
+
+
+def post_added(post, delta=1):
+    change_count(total_key(), delta)
+    change_count(count_key('author', post.author_id), delta)
+    if post.group_id:
+        change_count(count_key('group', post.group_id), delta)
+
+
+def post_removed(post):
+    post_added(post, -1)
+
+
+def group_changed(old_group_id, new_group_id):
+    if old_group_id:
+        change_count(count_key('group', old_group_id), -1)
+    if new_group_id:
+        change_count(count_key('group', new_group_id), 1)
+
+
+def drop_counts(scope, *pks, model=Post):
+    """Сбрасывает общий счётчик и счётчики перечисленных pk."""
+    cache.delete_many(
+        [total_key(model)] + [count_key(scope, pk, model) for pk in pks]
+    )
@@ -0,0 +1,23 @@
+"""Ключи Surrogate-Key страниц с постами (см. core.edgecache).
+
+Страница помечается ключами всех постов, групп и авторов, из которых
+собрана, а сигналы posts.signals сбрасывают эти ключи на прокси.
+"""
+# главная и «популярное»: меняются с каждым новым постом
+LISTING_TAG = 'posts'
+
+
+def post_tag(pk):
+    return f'post-{pk}'
+
+
+def group_tag(slug):
+    return f'group-{slug}'
+
+
+def author_tag(pk):
+    return f'author-{pk}'
+
+
+def page_tags(page_obj):
+    return [post_tag(post.pk) for post in page_obj.object_list]
@@ -0,0 +1,67 @@
+"""Компактное представление карточек постов и лент для кэша.
+
+Кэш по умолчанию хранит pickle, а pickle модели Django тянет за собой
+_state, кэши связанных объектов и имена классов. Карточка же - кортеж
+простых значений в формате marshal, лента - id, упакованные в 2 или 4
+байта в зависимости от самого большого из них.
+"""
+import marshal
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+# версия формата marshal, одинаковая во всех поддерживаемых Python
+MARSHAL_VERSION = 4
+# версия ключей карточек в кэше: меняется вместе с полями PostCard
+CARD_VERSION = 3
+# первый байт упакованной ленты - формат struct для её id
+SHORT_ID, LONG_ID = 'H', 'I'
+
+
+@dataclass
+class PostCard:
+    __slots__ = (
+        'id', 'text', 'pub_date', 'image', 'thumb_url', 'image_color',
+        'author_id', 'username', 'first_name', 'last_name',
+        'group_id', 'group_slug', 'group_title', 'sources',
+    )
+    id: int
+    text: str
+    pub_date: datetime
+    image: str
+    thumb_url: str
+    # фон на время загрузки картинки, '#rrggbb' или ''
+    image_color: str
+    author_id: int
+    username: str
+    first_name: str
+    last_name: str
+    # у поста без группы group_id равен 0
+    group_id: int
+    group_slug: str
+    group_title: str
+    # ((MIME-тип, srcset), ...) для <picture>, см. posts.images
+    sources: tuple
+
+
+def encode_card(card):
+    values = [getattr(card, name) for name in card.__slots__]
+    values[2] = card.pub_date.timestamp()
+    return marshal.dumps(tuple(values), MARSHAL_VERSION)
+
+
+def decode_card(data):
+    values = marshal.loads(data)
+    pub_date = datetime.fromtimestamp(values[2], timezone.utc)
+    return PostCard(*values[:2], pub_date, *values[3:])
+
+
+def pack_ids(ids):
+    id_format = SHORT_ID if max(ids, default=0) <= 0xFFFF else LONG_ID
+    return id_format.encode() + struct.pack(f'<{len(ids)}{id_format}', *ids)
+
+
+def unpack_ids(data):
+    id_format = data[:1].decode()
+    count = (len(data) - 1) // struct.calcsize(id_format)
+    return list(struct.unpack(f'<{count}{id_format}', data[1:]))
@@ -1,5 +1,6 @@
 from django.forms import ModelForm
 
+from .images import average_color
 from .models import Post, Comment
 
 
@@ -11,6 +12,16 @@ class PostForm(ModelForm):
                       'text': 'Текст нового поста'}
         fields = ["group", "text", "image"]
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not image:
+            # картинку убрали из поста
+            self.instance.image_color = ''
+        elif hasattr(image, 'content_type'):
+            # новая загрузка: цвет заглушки считается один раз здесь
+            self.instance.image_color = average_color(image)
+        return image
+
 
 class CommentForm(ModelForm):
     class Meta:
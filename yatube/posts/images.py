@@ -0,0 +1,136 @@
+"""Варианты картинки поста разной ширины и формата для srcset.
+
+Картинка декодируется один раз: JPEG сразу читается в уменьшенном
+масштабе (Image.draft), кадрируется под пропорции карточки, а из
+кадра получаются все ширины settings.IMAGE_VARIANT_WIDTHS во всех
+форматах settings.IMAGE_VARIANT_FORMATS, которые умеет эта сборка
+Pillow. Варианты записываются в PostImageVariant, и карточка поста
+(posts.post_cache) строит <picture> из таблицы, не обращаясь к
+sorl-thumbnail.
+"""
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from core.edgecache import purge
+
+from .edge import post_tag
+from .models import Post, PostImageVariant, post_image_storage
+from .post_cache import post_cache
+
+logger = logging.getLogger(__name__)
+
+# до какого размера уменьшать картинку для среднего цвета
+PLACEHOLDER_SIZE = 64
+
+# формат -> параметры сохранения Pillow
+SAVE_OPTIONS = {
+    'avif': {'quality': 60},
+    'webp': {'quality': 80, 'method': 4},
+    'jpeg': {'quality': 85, 'optimize': True, 'progressive': True},
+}
+
+
+def variant_formats():
+    """Форматы из настроек, которые эта сборка Pillow умеет сохранять."""
+    Image.init()
+    return [
+        name for name in settings.IMAGE_VARIANT_FORMATS
+        if name.upper() in Image.SAVE
+    ]
+
+
+def average_color(file):
+    """Средний цвет #rrggbb картинки из file для заглушки карточки.
+
+    JPEG декодируется сразу в масштабе 1/8.
+    """
+    file.seek(0)
+    with Image.open(file) as image:
+        image.draft('RGB', (PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+        color = image.convert('RGB').resize((1, 1), Image.BOX).getpixel(
+            (0, 0)
+        )
+    file.seek(0)
+    return '#{:02x}{:02x}{:02x}'.format(*color)
+
+
+def crop_box(width, height, aspect):
+    """Центральный кадр с пропорциями aspect (ширина / высота)."""
+    if width / height > aspect:
+        crop_width = round(height * aspect)
+        left = (width - crop_width) // 2
+        return left, 0, left + crop_width, height
+    crop_height = round(width / aspect)
+    top = (height - crop_height) // 2
+    return 0, top, width, top + crop_height
+
+
+def render_variants(file):
+    """Список (формат, ширина, высота, байты) для картинки из file."""
+    widths = sorted(settings.IMAGE_VARIANT_WIDTHS, reverse=True)
+    aspect = settings.IMAGE_VARIANT_ASPECT
+    variants = []
+    with Image.open(file) as image:
+        # JPEG декодируется сразу в масштабе 1/2..1/8, если хватает
+        image.draft('RGB', (widths[0], round(widths[0] / aspect)))
+        frame = ImageOps.exif_transpose(image).convert('RGB')
+    frame = frame.crop(crop_box(*frame.size, aspect))
+    # без увеличения: ширины больше кадра пропускаются, кроме самой малой
+    widths = [width for width in widths if width <= frame.width] or [
+        min(widths[-1], frame.width)
+    ]
+    for width in widths:
+        size = (width, max(round(width / aspect), 1))
+        resized = frame.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        for name in variant_formats():
+            buffer = io.BytesIO()
+            resized.save(buffer, name.upper(), **SAVE_OPTIONS.get(name, {}))
+            variants.append((name, *size, buffer.getvalue()))
+        # следующая ширина меньше: уменьшаем уже уменьшенный кадр
+        frame = resized
+    return variants
+
+
+def generate_variants(post_id, progress=None):
+    """Пересоздаёт варианты картинки поста post_id."""
+    post = Post.objects.filter(pk=post_id).only(
+        'id', 'image', 'image_color'
+    ).first()
+    if post is None:
+        return
+    variants = []
+    if post.image:
+        try:
+            with post.image.open('rb') as file:
+                if not post.image_color:
+                    # пост загружен до появления заглушек
+                    Post.objects.filter(pk=post_id).update(
+                        image_color=average_color(file)
+                    )
+                rendered = render_variants(file)
+        except (OSError, ValueError):
+            logger.exception('Не удалось создать варианты %s', post.image)
+            rendered = []
+        stem = os.path.splitext(os.path.basename(post.image.name))[0]
+        for name, width, height, data in rendered:
+            variants.append(PostImageVariant(
+                post_id=post_id, format=name, width=width, height=height,
+                image=post_image_storage.save(
+                    f'posts/variants/{stem}-{width}.{name}',
+                    ContentFile(data)
+                )
+            ))
+    with transaction.atomic():
+        # файлы вариантов общие у одинаковых картинок и не удаляются
+        PostImageVariant.objects.filter(post_id=post_id).delete()
+        PostImageVariant.objects.bulk_create(variants)
+    post_cache.invalidate(post_id)
+    purge(post_tag(post_id))
+    if progress:
+        progress(1, 1)
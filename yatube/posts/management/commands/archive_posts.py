@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_cutoff, archive_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше settings.ARCHIVE_AFTER_DAYS дней вместе '
+        'с комментариями в архивные таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            help='Возраст поста в днях, по умолчанию ARCHIVE_AFTER_DAYS.'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['days'])
+        state = {'total': 0}
+
+        def report(done, total=None):
+            if total is not None:
+                state['total'] = total
+            self.stdout.write(f'  {done}/{state["total"]}')
+
+        archive_posts(cutoff, report)
+        self.stdout.write(
+            f'В архив перенесено {state["total"]} постов '
+            f'старше {cutoff:%Y-%m-%d}'
+        )
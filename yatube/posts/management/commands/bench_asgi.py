@@ -0,0 +1,80 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.core.management.base import BaseCommand
+
+from core.asgi import AsgiHandler
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность WSGI и ASGI при одинаковом '
+        'числе потоков, когда клиенты медленно отправляют запрос и '
+        'читают ответ.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/')
+        parser.add_argument('--clients', type=int, default=64)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--delay', type=float, default=0.2,
+            help='Сколько секунд клиент отправляет запрос и читает ответ.'
+        )
+
+    def handle(self, *args, **options):
+        from yatube.wsgi import application
+        # первый запрос прогревает импорты и кэш
+        self.wsgi_request(application, options['url'], 0)
+        for title, run in (('wsgi', self.run_wsgi), ('asgi', self.run_asgi)):
+            start = time.monotonic()
+            run(application, **options)
+            elapsed = time.monotonic() - start
+            self.stdout.write(
+                f'{title}: {options["clients"]} запросов за {elapsed:.2f} с, '
+                f'{options["clients"] / elapsed:.1f} запросов/с'
+            )
+
+    def wsgi_request(self, application, url, delay):
+        # синхронный воркер занят, пока клиент передаёт запрос...
+        time.sleep(delay)
+        environ = {'PATH_INFO': url}
+        setup_testing_defaults(environ)
+        result = application(environ, lambda status, headers: None)
+        b''.join(result)
+        if hasattr(result, 'close'):
+            result.close()
+        # ...и пока он читает ответ
+        time.sleep(delay)
+
+    def run_wsgi(self, application, url, clients, threads, delay, **options):
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for _ in range(clients):
+                executor.submit(self.wsgi_request, application, url, delay)
+
+    def run_asgi(self, application, url, clients, threads, delay, **options):
+        handler = AsgiHandler(application, max_workers=threads)
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': url,
+            'headers': [(b'host', b'127.0.0.1')],
+        }
+
+        async def receive():
+            await asyncio.sleep(delay)
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.body' and not message.get(
+                'more_body'
+            ):
+                await asyncio.sleep(delay)
+
+        async def run():
+            await asyncio.gather(*(
+                handler(scope, receive, send) for _ in range(clients)
+            ))
+
+        asyncio.run(run())
+        handler.executor.shutdown()
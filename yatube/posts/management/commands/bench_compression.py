@@ -0,0 +1,65 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils.text import compress_string
+
+from core.minify import minify_html
+from posts.models import Group, Post
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class Command(BaseCommand):
+    help = (
+        'Размер ответа и затраты CPU на минификацию и сжатие '
+        'страниц index, group_list и profile.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        post = Post.objects.select_related('author').first()
+        group = Group.objects.first()
+        urls = [reverse('posts:index')]
+        if group:
+            urls.append(reverse('posts:posts', args=[group.slug]))
+        if post:
+            urls.append(reverse('posts:profile', args=[post.author.username]))
+        client = Client()
+        for url in urls:
+            with override_settings(HTML_MINIFY=False):
+                html = client.get(url).content.decode()
+            self.report(url, html, options['repeat'])
+
+    def measure(self, func, data, repeat):
+        start = time.process_time()
+        for _ in range(repeat):
+            result = func(data)
+        return result, (time.process_time() - start) / repeat * 1000
+
+    def report(self, url, html, repeat):
+        minified, minify_ms = self.measure(minify_html, html, repeat)
+        rows = [('raw', len(html.encode()), 0),
+                ('minified', len(minified.encode()), minify_ms)]
+        for title, source in (('', html), ('minified+', minified)):
+            data = source.encode()
+            compressed, ms = self.measure(compress_string, data, repeat)
+            rows.append((title + 'gzip', len(compressed), ms))
+            if brotli is not None:
+                # с тем же качеством, что и core.middleware
+                compressed, ms = self.measure(
+                    lambda d: brotli.compress(
+                        d, quality=settings.COMPRESS_BROTLI_QUALITY
+                    ), data, repeat
+                )
+                rows.append((title + 'br', len(compressed), ms))
+        self.stdout.write(url)
+        for title, size, ms in rows:
+            self.stdout.write(f'  {title:14} {size:8} bytes  {ms:7.3f} ms CPU')
@@ -0,0 +1,61 @@
+import pickle
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.encoding import decode_card, encode_card, pack_ids, unpack_ids
+from posts.models import Post
+from posts.post_cache import to_card
+
+
+class Command(BaseCommand):
+    help = (
+        'Размер и скорость упаковки страницы постов и ленты: pickle, '
+        'которым пользуется кэш Django, против posts.encoding.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        posts = list(Post.objects.select_related('author', 'group')[
+            :settings.POSTS_LIMIT
+        ])
+        if not posts:
+            self.stdout.write('Нет постов.')
+            return
+        cards = [to_card(post) for post in posts]
+        ids = list(Post.objects.values_list('id', flat=True)[
+            :settings.TIMELINE_LENGTH
+        ])
+        repeat = options['repeat']
+        self.stdout.write(f'Страница из {len(posts)} постов:')
+        self.report('pickle Post', posts, pickle.dumps, pickle.loads, repeat)
+        self.report(
+            'marshal PostCard', cards,
+            lambda cards: [encode_card(card) for card in cards],
+            lambda data: [decode_card(item) for item in data],
+            repeat,
+        )
+        self.stdout.write(f'Лента из {len(ids)} id:')
+        self.report('pickle list', ids, pickle.dumps, pickle.loads, repeat)
+        self.report('struct', ids, pack_ids, unpack_ids, repeat)
+
+    def measure(self, func, data, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = func(data)
+        return result, (time.perf_counter() - start) / repeat * 1000000
+
+    def report(self, title, value, dumps, loads, repeat):
+        data, dumps_us = self.measure(dumps, value, repeat)
+        _, loads_us = self.measure(loads, data, repeat)
+        if isinstance(data, list):
+            # кэш хранит каждую карточку отдельным ключом
+            size = sum(len(pickle.dumps(item)) for item in data)
+        else:
+            size = len(pickle.dumps(data))
+        self.stdout.write(f'  {title:18} {size:8} bytes  '
+                          f'dumps {dumps_us:8.1f} us  '
+                          f'loads {loads_us:8.1f} us')
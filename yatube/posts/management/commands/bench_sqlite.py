@@ -0,0 +1,109 @@
+import inspect
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test import RequestFactory, override_settings
+
+from posts import views
+from posts.models import Comment, Post, User
+
+# Поведение SQLite «из коробки»: журнал с откатом, полная синхронизация.
+DEFAULT_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает конкурентное чтение index и запись add_comment '
+        'с PRAGMA SQLite по умолчанию и с settings.SQLITE_PRAGMAS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Бенчмарк рассчитан на SQLite.')
+        if connection.settings_dict['NAME'] in ('', ':memory:'):
+            raise CommandError('Нужна файловая база данных.')
+        user, _ = User.objects.get_or_create(username='bench_sqlite')
+        post = Post.objects.create(text='bench', author=user)
+        try:
+            for title, pragmas in (
+                ('default', DEFAULT_PRAGMAS),
+                ('tuned', settings.SQLITE_PRAGMAS),
+            ):
+                connections.close_all()
+                with override_settings(
+                    SQLITE_PRAGMAS=pragmas, THROTTLE_ENABLED=False
+                ):
+                    stats = self.run(user, post, **options)
+                self.report(title, stats, options['seconds'])
+        finally:
+            connections.close_all()
+            with override_settings(SQLITE_PRAGMAS=settings.SQLITE_PRAGMAS):
+                post.delete()
+                user.delete()
+
+    def run(self, user, post, readers, writers, seconds, **options):
+        factory = RequestFactory()
+        deadline = time.monotonic() + seconds
+        stats = {'reads': [], 'writes': [], 'locked': 0}
+        lock = threading.Lock()
+        # снимаем все декораторы index: __wrapped__ снимает только
+        # cache_policy, и public_cache отдавал бы страницу из кэша
+        index = inspect.unwrap(views.index)
+
+        def read():
+            request = factory.get('/')
+            request.user = AnonymousUser()
+            index(request)
+
+        def write():
+            request = factory.post('/', {'text': 'bench comment'})
+            request.user = user
+            views.add_comment(request, post_id=post.id)
+
+        def loop(action, kind):
+            latencies, locked = [], 0
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    action()
+                except OperationalError:
+                    locked += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+            connection.close()
+            with lock:
+                stats[kind].extend(latencies)
+                stats['locked'] += locked
+
+        threads = [
+            threading.Thread(target=loop, args=(read, 'reads'))
+            for _ in range(readers)
+        ] + [
+            threading.Thread(target=loop, args=(write, 'writes'))
+            for _ in range(writers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        Comment.objects.filter(post=post).delete()
+        return stats
+
+    def report(self, title, stats, seconds):
+        reads = sorted(stats['reads'])
+        p95 = reads[int(len(reads) * 0.95)] * 1000 if reads else 0
+        self.stdout.write(
+            f'{title:8} reads/s: {len(reads) / seconds:8.1f}  '
+            f'p95 read: {p95:6.1f} ms  '
+            f'writes/s: {len(stats["writes"]) / seconds:8.1f}  '
+            f'locked errors: {stats["locked"]}'
+        )
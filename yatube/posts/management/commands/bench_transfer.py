@@ -0,0 +1,72 @@
+import os
+import resource
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.test import override_settings
+from django.utils import timezone
+
+from posts.bulk import delete_by_author
+from posts.models import Post, User
+from posts.transfer import dumps, export_records, import_lines
+
+
+class Command(BaseCommand):
+    help = (
+        'Скорость и пиковая память import_posts и export_posts на '
+        'синтетических постах. Посты создаются от пользователя '
+        'bench_transfer и удаляются после замера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+
+    def handle(self, *args, **options):
+        count = options['posts']
+        user, _ = User.objects.get_or_create(username='bench_transfer')
+        first_id = (Post.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+        fd, path = tempfile.mkstemp(suffix='.ndjson')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                self.generate(file, user, first_id, count)
+            self.stdout.write(
+                f'Файл: {count} постов, '
+                f'{os.path.getsize(path) / 1024 / 1024:.1f} MB'
+            )
+            with open(path, encoding='utf-8') as file:
+                self.measure('import', count, import_lines, file)
+            with open(os.devnull, 'w') as file:
+                self.measure('export', count, self.export, user, file)
+        finally:
+            os.remove(path)
+            delete_by_author([user.pk], lambda *args: None)
+            user.delete()
+
+    def generate(self, file, user, first_id, count):
+        now = timezone.now()
+        file.write(dumps({'type': 'user', 'username': user.username,
+                          'first_name': '', 'last_name': ''}) + '\n')
+        for post_id in range(first_id, first_id + count):
+            file.write(dumps({
+                'type': 'post', 'id': post_id, 'text': f'пост {post_id}',
+                'pub_date': now.isoformat(), 'author': user.username,
+                'group': None, 'image': '', 'hot_score': 0,
+            }) + '\n')
+
+    def export(self, user, file):
+        for record in export_records(Post.objects.filter(author=user)):
+            file.write(dumps(record) + '\n')
+
+    def measure(self, title, count, func, *args):
+        start = time.perf_counter()
+        # с DEBUG журнал запросов сам съедает сотни мегабайт
+        with override_settings(DEBUG=False):
+            func(*args)
+        seconds = time.perf_counter() - start
+        # ru_maxrss в Linux - в килобайтах
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(f'{title:7} {seconds:8.1f} s  '
+                          f'{count / seconds:10.0f} posts/s  '
+                          f'peak RSS {peak:7.1f} MB')
@@ -0,0 +1,59 @@
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from posts.counts import drop_counts
+from posts.encoding import unpack_ids
+from posts.models import Group, Post, User
+from posts.timelines import SCOPES, build_timeline, timeline_key
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Сверяет ленты в кэше с базой данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Перестроить ленты, которые разошлись с базой.'
+        )
+
+    def handle(self, *args, **options):
+        broken = 0
+        for scope, model in (('group', Group), ('author', User)):
+            checked = 0
+            pks = model.objects.values_list('pk', flat=True).iterator()
+            while True:
+                keys = {
+                    timeline_key(scope, pk): pk
+                    for pk in islice(pks, BATCH_SIZE)
+                }
+                if not keys:
+                    break
+                for key, data in cache.get_many(keys).items():
+                    checked += 1
+                    ids = unpack_ids(data)
+                    ok = self.check_timeline(
+                        scope, keys[key], ids, options['fix']
+                    )
+                    if not ok:
+                        broken += 1
+            self.stdout.write(f'{scope}: проверено {checked} лент')
+        if broken and not options['fix']:
+            self.stdout.write('Запустите с --fix, чтобы перестроить их.')
+
+    def check_timeline(self, scope, pk, ids, fix):
+        expected = list(Post.objects.filter(
+            **{SCOPES[scope]: pk}
+        ).values_list('id', flat=True)[:settings.TIMELINE_LENGTH])
+        if ids == expected:
+            return True
+        self.stdout.write(f'{timeline_key(scope, pk)}: в кэше {len(ids)} id, '
+                          f'в базе {len(expected)}')
+        if fix:
+            build_timeline(scope, pk)
+            drop_counts(scope, pk)
+        return False
@@ -0,0 +1,72 @@
+import gzip
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from posts.models import ArchivedPost
+from posts.transfer import dumps, export_records, filter_posts
+
+
+def parse_moment(value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'Неверная дата: {value}')
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты, архив, комментарии и подписки в NDJSON, по одной '
+        'записи на строку. Файл с расширением .gz сжимается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default='-',
+                            help='Файл для выгрузки, по умолчанию stdout.')
+        parser.add_argument('--group', help='Slug группы.')
+        parser.add_argument('--author', help='Имя автора.')
+        parser.add_argument('--since', type=parse_moment,
+                            help='Посты не раньше этой даты.')
+        parser.add_argument('--until', type=parse_moment,
+                            help='Посты раньше этой даты.')
+        parser.add_argument('--no-comments', action='store_true')
+        parser.add_argument('--no-follows', action='store_true')
+        parser.add_argument(
+            '--no-archive', action='store_true',
+            help='Не выгружать архивные посты и их комментарии.'
+        )
+
+    def handle(self, *args, **options):
+        filters = (
+            options['group'], options['author'],
+            options['since'], options['until'],
+        )
+        archived = None
+        if not options['no_archive']:
+            archived = filter_posts(*filters, model=ArchivedPost)
+        records = export_records(
+            filter_posts(*filters), not options['no_comments'],
+            not options['no_follows'], archived
+        )
+        output = options['output']
+        if output == '-':
+            self.write(records, self.stdout.write)
+            return
+        opener = gzip.open if output.endswith('.gz') else open
+        with opener(output, 'wt', encoding='utf-8') as file:
+            written = self.write(records, lambda line: file.write(f'{line}\n'))
+        self.stdout.write(f'Выгружено {written} записей в {output}')
+
+    def write(self, records, write_line):
+        written = 0
+        for record in records:
+            write_line(dumps(record))
+            written += 1
+        return written
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import generate_variants, variant_formats
+from posts.models import Post, PostImageVariant
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт варианты картинок для srcset у постов, загруженных до '
+        'их появления. С --all пересоздаёт варианты всех картинок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Форматы: {", ".join(variant_formats())}')
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.exclude(
+                pk__in=PostImageVariant.objects.values('post_id')
+            )
+        ids = list(posts.order_by('pk').values_list('pk', flat=True))
+        for done, post_id in enumerate(ids, 1):
+            generate_variants(post_id)
+            if done % 100 == 0:
+                self.stdout.write(f'  {done}/{len(ids)}')
+        self.stdout.write(f'Обработано постов: {len(ids)}')
@@ -0,0 +1,66 @@
+import gzip
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import TransferError, import_lines
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает выгрузку export_posts пачками. Номер последней '
+        'сохранённой строки пишется в файл контрольной точки, и '
+        'прерванная загрузка продолжается с него.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Файл NDJSON или .gz.')
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки, по умолчанию <input>.checkpoint.'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать сначала, не глядя на контрольную точку.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['input']
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        start = 0 if options['restart'] else self.read_checkpoint(checkpoint)
+        if start:
+            self.stdout.write(f'Продолжаем со строки {start + 1}')
+        opener = gzip.open if path.endswith('.gz') else open
+        try:
+            with opener(path, 'rt', encoding='utf-8') as file:
+                stats = import_lines(
+                    file, start,
+                    lambda line: self.write_checkpoint(checkpoint, line)
+                )
+        except (OSError, TransferError) as error:
+            raise CommandError(error)
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(', '.join(
+            f'{kind}: {count}' for kind, count in stats.items()
+        ))
+        self.stdout.write(
+            'Рейтинг постов взят из файла; после загрузки в другую базу '
+            'его можно пересчитать командой rebuild_hot_scores.'
+        )
+
+    def read_checkpoint(self, path):
+        try:
+            with open(path) as file:
+                return json.load(file)['line']
+        except FileNotFoundError:
+            return 0
+        except (KeyError, TypeError, ValueError):
+            raise CommandError(f'Повреждена контрольная точка {path}')
+
+    def write_checkpoint(self, path, line):
+        # запись через временный файл: точка не окажется наполовину записанной
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump({'line': line}, file)
+        os.replace(f'{path}.tmp', path)
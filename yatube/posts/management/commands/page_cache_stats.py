@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.access import access_counter
+from core.pagecache import ANONYMOUS, AUTHENTICATED, stats_kind
+
+
+class Command(BaseCommand):
+    help = 'Доля попаданий в кэш публичных страниц для гостей и пользователей.'
+
+    def handle(self, *args, **options):
+        access_counter.flush()
+        for user_class in (ANONYMOUS, AUTHENTICATED):
+            totals = access_counter.totals(stats_kind(user_class))
+            requests = totals['hit'] + totals['miss']
+            ratio = totals['hit'] / requests if requests else 0
+            self.stdout.write(
+                f'{user_class:14} запросов {requests:8}  '
+                f'попаданий {totals["hit"]:8}  доля {ratio:6.1%}'
+            )
@@ -0,0 +1,80 @@
+import math
+
+import numpy
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts import ranking
+from posts.models import Comment, Follow, Post
+from posts.utils import exclude_authors
+from users.models import UserDeletion
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает Post.hot_score по всем публикациям и комментариям '
+        'векторно, с numpy.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        followers = dict(
+            Follow.objects.order_by().values_list('author_id')
+            .annotate(Count('id'))
+        )
+        posts = list(Post.objects.order_by('id').values_list(
+            'id', 'author_id', 'pub_date'
+        ).iterator())
+        # комментарии мягко удалённых пользователей скрыты и скоро удалятся
+        comments = exclude_authors(
+            Comment.objects.order_by(), UserDeletion.objects.hidden_ids()
+        ).values_list('post_id', 'created').iterator()
+        scores = self.compute(posts, comments, followers)
+        updated = 0
+        batch_size = options['batch_size']
+        for start in range(0, len(posts), batch_size):
+            batch = [
+                Post(id=post_id, hot_score=score)
+                for (post_id, _, _), score in zip(
+                    posts[start:start + batch_size],
+                    scores[start:start + batch_size]
+                )
+            ]
+            with transaction.atomic():
+                Post.objects.bulk_update(batch, ['hot_score'])
+            updated += len(batch)
+        self.stdout.write(f'Пересчитан рейтинг {updated} постов')
+
+    def rate(self):
+        return math.log(2) / settings.HOT_HALF_LIFE
+
+    def compute(self, posts, comments, followers):
+        ids = numpy.fromiter((post[0] for post in posts), numpy.int64)
+        reach = numpy.fromiter(
+            (followers.get(post[1], 0) for post in posts), numpy.float64
+        )
+        times = numpy.fromiter(
+            (post[2].timestamp() for post in posts), numpy.float64
+        )
+        scores = numpy.log(
+            ranking.POST_WEIGHT + ranking.FOLLOWER_WEIGHT * numpy.log1p(reach)
+        ) + (times - ranking.EPOCH) * self.rate()
+        comments = list(comments)
+        if comments:
+            # посты упорядочены по id, позиция поста - бинарным поиском
+            positions = numpy.searchsorted(
+                ids, numpy.fromiter((c[0] for c in comments), numpy.int64)
+            )
+            created = numpy.fromiter(
+                (c[1].timestamp() for c in comments), numpy.float64
+            )
+            numpy.logaddexp.at(
+                scores, positions,
+                math.log(ranking.COMMENT_WEIGHT)
+                + (created - ranking.EPOCH) * self.rate()
+            )
+        return scores.tolist()
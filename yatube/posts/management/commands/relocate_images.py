@@ -0,0 +1,81 @@
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.edgecache import purge
+from posts.edge import post_tag
+from posts.models import ArchivedPost, Post, post_image_storage
+from posts.post_cache import post_cache
+from posts.transfer import chunks
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки постов, загруженные до ContentAddressedStorage, '
+        'в подкаталоги по хэшу содержимого и обновляет Post.image пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--keep-old', action='store_true',
+            help='Не удалять старые файлы после переноса.'
+        )
+
+    def handle(self, *args, **options):
+        if not hasattr(post_image_storage, 'is_content_name'):
+            self.stdout.write('POST_IMAGE_STORAGE не раскладывает файлы '
+                              'по хэшу, переносить нечего.')
+            return
+        for model in (Post, ArchivedPost):
+            moved, missing = 0, 0
+            posts = model.objects.exclude(image='').only('id', 'image')
+            for chunk in chunks(posts, options['batch_size']):
+                names, changed = {}, []
+                for post in chunk:
+                    name = post.image.name
+                    if post_image_storage.is_content_name(name):
+                        continue
+                    if name not in names:
+                        names[name] = self.relocate(name)
+                    if names[name] is None:
+                        missing += 1
+                        continue
+                    post.image.name = names[name]
+                    changed.append(post)
+                moved += len(changed)
+                self.save(model, changed, names, options['keep_old'])
+            self.stdout.write(f'{model._meta.verbose_name_plural}: '
+                              f'перенесено {moved}, нет файла у {missing}')
+
+    def relocate(self, name):
+        try:
+            if not post_image_storage.exists(name):
+                return None
+        except SuspiciousFileOperation:
+            # путь вне MEDIA_ROOT
+            return None
+        with post_image_storage.open(name) as file:
+            return post_image_storage.save(name, File(file))
+
+    def save(self, model, posts, names, keep_old):
+        if not posts:
+            return
+        with transaction.atomic():
+            model.objects.bulk_update(posts, ['image'])
+        if model is Post:
+            ids = [post.pk for post in posts]
+            post_cache.invalidate(*ids)
+            purge(*map(post_tag, ids))
+        if keep_old:
+            return
+        # старое имя могло остаться у постов, которые ещё не перенесены
+        referenced = set()
+        for other in (Post, ArchivedPost):
+            referenced.update(other.objects.filter(
+                image__in=list(names)
+            ).values_list('image', flat=True))
+        for name, new_name in names.items():
+            if new_name and name not in referenced:
+                post_image_storage.delete(name)
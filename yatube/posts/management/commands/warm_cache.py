@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.warmup import warm, warm_targets
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кэш главной, самых посещаемых групп и профилей: '
+        'например, после деплоя.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--groups', type=int, help='Сколько групп.')
+        parser.add_argument('--profiles', type=int, help='Сколько профилей.')
+        parser.add_argument(
+            '--concurrency', type=int,
+            help='Сколько страниц запрашивать одновременно.'
+        )
+
+    def handle(self, *args, **options):
+        urls = warm_targets(options['groups'], options['profiles'])
+        start = time.perf_counter()
+        statuses = warm(urls, options['concurrency'])
+        for url, status in statuses.items():
+            self.stdout.write(f'{status} {url}')
+        self.stdout.write(f'Прогрето {len(urls)} страниц за '
+                          f'{time.perf_counter() - start:.2f} с')
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from posts.models import Group, User
+from posts.timelines import build_timeline
+
+
+class Command(BaseCommand):
+    help = 'Строит в кэше ленты самых больших групп и самых активных авторов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=100,
+            help='Сколько групп и сколько авторов прогреть.'
+        )
+
+    def handle(self, *args, **options):
+        for scope, model in (('group', Group), ('author', User)):
+            pks = model.objects.annotate(
+                posts_count=Count('posts')
+            ).filter(posts_count__gt=0).order_by(
+                '-posts_count'
+            ).values_list('pk', flat=True)[:options['limit']]
+            for pk in pks:
+                build_timeline(scope, pk)
+            self.stdout.write(f'{scope}: {len(pks)} лент')
@@ -0,0 +1,22 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(db_index=True, default=0, editable=False, verbose_name='Рейтинг'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-hot_score'], name='posts_post_group_i_922479_idx'),
+        ),
+    ]
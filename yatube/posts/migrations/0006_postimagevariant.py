@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:05
+
+import core.storage
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostImageVariant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(max_length=10, verbose_name='Формат')),
+                ('width', models.PositiveIntegerField(verbose_name='Ширина')),
+                ('height', models.PositiveIntegerField(verbose_name='Высота')),
+                ('image', models.ImageField(storage=core.storage.ContentAddressedStorage(), upload_to='posts/variants/', verbose_name='Картинка')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_variants', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Вариант картинки',
+                'verbose_name_plural': 'Варианты картинок',
+                'ordering': ('format', 'width'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postimagevariant',
+            constraint=models.UniqueConstraint(fields=('post', 'format', 'width'), name='unique_image_variant'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_postimagevariant'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Thumbnail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, verbose_name='Картинка')),
+                ('geometry', models.CharField(max_length=50, verbose_name='Размер')),
+                ('url', models.CharField(max_length=255, verbose_name='Адрес')),
+            ],
+            options={
+                'verbose_name': 'Миниатюра',
+                'verbose_name_plural': 'Миниатюры',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='thumbnail',
+            constraint=models.UniqueConstraint(fields=('source', 'geometry'), name='unique_thumbnail'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7, verbose_name='Средний цвет картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7, verbose_name='Средний цвет картинки'),
+        ),
+    ]
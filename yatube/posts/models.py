@@ -1,8 +1,14 @@
+from django.conf import settings
+from django.core.files.storage import get_storage_class
 from django.db import models
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# хранилище картинок постов; миниатюры sorl-thumbnail остаются в
+# DEFAULT_FILE_STORAGE
+post_image_storage = get_storage_class(settings.POST_IMAGE_STORAGE)()
+
 
 class Group(models.Model):
     title = models.CharField(
@@ -29,7 +35,8 @@ class Post(models.Model):
     )
     pub_date = models.DateTimeField(
         verbose_name='Дата публикации',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True
     )
     author = models.ForeignKey(
         User,
@@ -50,12 +57,29 @@ class Post(models.Model):
     image = models.ImageField(
         verbose_name='Картинка',
         upload_to='posts/',
+        storage=post_image_storage,
         blank=True
 
     )
+    # заполняется при загрузке в PostForm, см. posts.images.average_color
+    image_color = models.CharField(
+        verbose_name='Средний цвет картинки',
+        max_length=7,
+        blank=True,
+        editable=False
+    )
+    hot_score = models.FloatField(
+        verbose_name='Рейтинг',
+        default=0,
+        db_index=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['group', '-hot_score']),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -63,6 +87,58 @@ class Post(models.Model):
         return self.text[:15]
 
 
+class PostImageVariant(models.Model):
+    """Уменьшенная копия картинки поста для srcset (posts.images)."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_variants',
+        verbose_name='Пост'
+    )
+    format = models.CharField(verbose_name='Формат', max_length=10)
+    width = models.PositiveIntegerField(verbose_name='Ширина')
+    height = models.PositiveIntegerField(verbose_name='Высота')
+    image = models.ImageField(
+        verbose_name='Картинка',
+        upload_to='posts/variants/',
+        storage=post_image_storage
+    )
+
+    class Meta:
+        ordering = ('format', 'width')
+        verbose_name = 'Вариант картинки'
+        verbose_name_plural = 'Варианты картинок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'format', 'width'],
+                name='unique_image_variant'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.format} {self.width}w'
+
+
+class Thumbnail(models.Model):
+    """Адрес готовой миниатюры картинки, см. posts.thumbnails."""
+    source = models.CharField(verbose_name='Картинка', max_length=255)
+    geometry = models.CharField(verbose_name='Размер', max_length=50)
+    url = models.CharField(verbose_name='Адрес', max_length=255)
+
+    class Meta:
+        verbose_name = 'Миниатюра'
+        verbose_name_plural = 'Миниатюры'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'geometry'],
+                name='unique_thumbnail'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.source} {self.geometry}'
+
+
 class Comment(models.Model):
     post = models.ForeignKey(
         Post,
@@ -116,3 +192,82 @@ class Follow(models.Model):
                 name="unique_follow"
             )
         ]
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый командой archive_posts.
+
+    id совпадает с id поста в posts_post: ссылки на пост не меняются.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(verbose_name='Текст поста')
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        verbose_name='Картинка',
+        upload_to='posts/',
+        storage=post_image_storage,
+        blank=True
+    )
+    image_color = models.CharField(
+        verbose_name='Средний цвет картинки',
+        max_length=7,
+        blank=True,
+        editable=False
+    )
+    hot_score = models.FloatField(verbose_name='Рейтинг', default=0)
+    archived = models.DateTimeField(
+        verbose_name='Дата архивации',
+        auto_now_add=True
+    )
+
+    class Meta:
+        ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['-pub_date']),
+            models.Index(fields=['group', '-pub_date']),
+            models.Index(fields=['author', '-pub_date']),
+        ]
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    text = models.TextField(verbose_name='Текст комментария')
+    created = models.DateTimeField(verbose_name='Дата комментария')
+
+    class Meta:
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+    def __str__(self):
+        return self.text
@@ -0,0 +1,149 @@
+"""Кэш карточек постов для шаблона posts/includes/post.html.
+
+Карточка - всё, что нужно для отрисовки поста в списке: текст, дата,
+автор, группа, адрес миниатюры и srcset вариантов картинки. Страница
+собирается одним cache.get_many, а отсутствующие в кэше посты - одним
+in_bulk, их миниатюры - пачкой через posts.thumbnails.
+Из карточек восстанавливаются объекты Post, поэтому шаблоны и код,
+работающие с page_obj, не меняются. В кэше карточка хранится в
+компактном виде, см. posts.encoding.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .encoding import CARD_VERSION, PostCard, decode_card, encode_card
+from .models import Group, Post, PostImageVariant, User
+from .thumbnails import (
+    THUMBNAIL_GEOMETRY, resolve_thumbnails, thumbnail_url
+)
+
+
+def post_key(post_id):
+    return f'post:{post_id}'
+
+
+def image_sources(variants):
+    """((MIME-тип, srcset), ...) в порядке IMAGE_VARIANT_FORMATS."""
+    srcsets = {}
+    for variant in sorted(variants, key=lambda variant: variant.width):
+        srcsets.setdefault(variant.format, []).append(
+            f'{variant.image.url} {variant.width}w'
+        )
+    return tuple(
+        (f'image/{name}', ', '.join(srcsets[name]))
+        for name in settings.IMAGE_VARIANT_FORMATS if name in srcsets
+    )
+
+
+def fallback_url(variants):
+    """Вариант JPEG, ближайший к ширине карточки, вместо миниатюры."""
+    width = int(THUMBNAIL_GEOMETRY.split('x')[0])
+    jpegs = [variant for variant in variants if variant.format == 'jpeg']
+    if not jpegs:
+        return ''
+    return min(jpegs, key=lambda variant: abs(variant.width - width)).image.url
+
+
+def variants_by_post(posts):
+    """Варианты картинок одним запросом; посты без картинки не ищутся."""
+    variants = {}
+    ids = [post.pk for post in posts if post.image]
+    if ids:
+        for variant in PostImageVariant.objects.filter(post_id__in=ids):
+            variants.setdefault(variant.post_id, []).append(variant)
+    return variants
+
+
+def to_card(post, variants=None, thumb_url=None):
+    author = post.author
+    group = post.group
+    if variants is None:
+        variants = list(post.image_variants.all()) if post.image else []
+    if thumb_url is None:
+        thumb_url = fallback_url(variants) or thumbnail_url(post.image)
+    return PostCard(
+        id=post.pk,
+        text=post.text,
+        pub_date=post.pub_date,
+        image=post.image.name or '',
+        thumb_url=thumb_url,
+        image_color=post.image_color,
+        author_id=author.pk,
+        username=author.username,
+        first_name=author.first_name,
+        last_name=author.last_name,
+        group_id=group.pk if group else 0,
+        group_slug=group.slug if group else '',
+        group_title=group.title if group else '',
+        sources=image_sources(variants),
+    )
+
+
+def from_card(card):
+    post = Post(
+        id=card.id,
+        text=card.text,
+        pub_date=card.pub_date,
+        image=card.image,
+        image_color=card.image_color,
+        author=User(id=card.author_id, username=card.username,
+                    first_name=card.first_name, last_name=card.last_name),
+    )
+    if card.group_id:
+        post.group = Group(id=card.group_id, slug=card.group_slug,
+                           title=card.group_title)
+    post.thumb_url = card.thumb_url
+    post.image_sources = card.sources
+    post._state.adding = False
+    post._state.db = 'default'
+    return post
+
+
+class PostCache:
+    def get_many(self, ids):
+        """Посты с данными id в том же порядке; удалённые пропускаются."""
+        ids = list(ids)
+        cards = {
+            card.id: card
+            for card in map(
+                decode_card,
+                cache.get_many(
+                    [post_key(pk) for pk in ids], version=CARD_VERSION
+                ).values()
+            )
+        }
+        missing = [pk for pk in ids if pk not in cards]
+        if missing:
+            posts = Post.objects.select_related(
+                'author', 'group'
+            ).in_bulk(missing).values()
+            variants = variants_by_post(posts)
+            thumbnails = resolve_thumbnails(
+                post.image for post in posts if post.pk not in variants
+            )
+            fetched = {
+                post.pk: to_card(
+                    post, variants.get(post.pk, []),
+                    fallback_url(variants.get(post.pk, []))
+                    or thumbnails.get(post.image.name, '')
+                )
+                for post in posts
+            }
+            cache.set_many(
+                {
+                    post_key(pk): encode_card(card)
+                    for pk, card in fetched.items()
+                },
+                settings.POST_CACHE_TIMEOUT,
+                version=CARD_VERSION
+            )
+            cards.update(fetched)
+        return [from_card(cards[pk]) for pk in ids if pk in cards]
+
+    def invalidate(self, *ids):
+        cache.delete_many(
+            [post_key(pk) for pk in ids], version=CARD_VERSION
+        )
+
+
+post_cache = PostCache()
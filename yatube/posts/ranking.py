@@ -0,0 +1,70 @@
+"""Рейтинг «популярное»: посты с недавними комментариями и охватом.
+
+Каждое событие (публикация, комментарий) имеет вес w и время t. Рейтинг
+поста - сумма w * 2 ** ((t - now) / HOT_HALF_LIFE) по его событиям, то
+есть вклад события вдвое падает каждые HOT_HALF_LIFE секунд. Множитель
+2 ** (-now / HOT_HALF_LIFE) общий для всех постов, поэтому в
+Post.hot_score хранится логарифм суммы без него:
+
+    hot_score = log(sum(w * 2 ** ((t - EPOCH) / HOT_HALF_LIFE)))
+
+Старые посты пересчитывать не нужно: новое событие только увеличивает
+hot_score своего поста (log-sum-exp), а сортировка по индексу hot_score
+сразу даёт рейтинг на текущий момент.
+"""
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Exp, Greatest, Least, Ln
+from django.utils.timezone import now, utc
+
+from .models import Follow, Post
+
+EPOCH = datetime(2021, 1, 1, tzinfo=utc).timestamp()
+POST_WEIGHT = 1.0
+COMMENT_WEIGHT = 1.0
+# вклад каждого подписчика автора в вес публикации убывает как log1p
+FOLLOWER_WEIGHT = 1.0
+
+
+def event_score(weight, when):
+    return math.log(weight) + (
+        (when.timestamp() - EPOCH) * math.log(2) / settings.HOT_HALF_LIFE
+    )
+
+
+def publication_weight(followers):
+    return POST_WEIGHT + FOLLOWER_WEIGHT * math.log1p(followers)
+
+
+def initial_score(post):
+    followers = Follow.objects.filter(author_id=post.author_id).count()
+    # pub_date нового поста заполняется позже, при записи в базу
+    return event_score(publication_weight(followers), post.pub_date or now())
+
+
+def comment_added(comment):
+    """Поднимает рейтинг поста одним UPDATE без чтения строки.
+
+    log(exp(hot_score) + exp(score)) считается в базе от текущего
+    hot_score без переполнения, поэтому одновременные комментарии не
+    теряют вклад друг друга.
+    """
+    score = Value(
+        event_score(COMMENT_WEIGHT, comment.created),
+        output_field=FloatField()
+    )
+    high = Greatest(F('hot_score'), score)
+    low = Least(F('hot_score'), score)
+    Post.objects.filter(pk=comment.post_id).update(
+        hot_score=high + Ln(Value(1.0) + Exp(low - high))
+    )
+
+
+def hot_posts(group=None):
+    posts = Post.objects.order_by('-hot_score')
+    if group is not None:
+        posts = posts.filter(group=group)
+    return posts
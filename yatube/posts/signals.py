@@ -0,0 +1,134 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.edgecache import purge
+from core.jobs import start_job
+
+from . import counts, images, ranking, timelines
+from .edge import LISTING_TAG, author_tag, group_tag, post_tag
+from .models import Comment, Group, Post, User
+from .post_cache import post_cache
+
+
+@receiver(pre_save, sender=Post)
+def set_hot_score(sender, instance, **kwargs):
+    if instance._state.adding and not instance.hot_score:
+        instance.hot_score = ranking.initial_score(instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_saved_state(sender, instance, **kwargs):
+    if instance.pk is not None and not instance._state.adding:
+        saved = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'image'
+        ).first()
+        if saved is not None:
+            instance._saved_group_id, instance._saved_image = saved
+
+
+@receiver(post_save, sender=Post)
+def schedule_image_variants(sender, instance, created, **kwargs):
+    if instance.image.name == getattr(instance, '_saved_image', ''):
+        return
+    post_id = instance.pk
+    # картинка уже в хранилище, а пост виден задаче только после COMMIT
+    transaction.on_commit(lambda: start_job(
+        f'Варианты картинки поста {post_id}',
+        images.generate_variants, post_id
+    ))
+
+
+@receiver(post_save, sender=Post)
+def update_timelines(sender, instance, created, **kwargs):
+    if created:
+        counts.post_added(instance)
+        timelines.push_post('author', instance.author_id, instance.pk)
+        if instance.group_id:
+            timelines.push_post('group', instance.group_id, instance.pk)
+        return
+    post_cache.invalidate(instance.pk)
+    old_group_id = getattr(instance, '_saved_group_id', instance.group_id)
+    if old_group_id != instance.group_id:
+        counts.group_changed(old_group_id, instance.group_id)
+        if old_group_id:
+            timelines.remove_post('group', old_group_id, instance.pk)
+        if instance.group_id:
+            # место поста в ленте новой группы определит сортировка в базе
+            timelines.drop_timeline('group', instance.group_id)
+
+
+@receiver(post_save, sender=Post)
+def purge_post_pages(sender, instance, created, **kwargs):
+    if created:
+        tags = [LISTING_TAG, author_tag(instance.author_id)]
+        if instance.group_id:
+            tags.append(group_tag(instance.group.slug))
+        purge(*tags)
+        return
+    tags = [post_tag(instance.pk)]
+    old_group_id = getattr(instance, '_saved_group_id', instance.group_id)
+    if old_group_id != instance.group_id:
+        tags += map(group_tag, Group.objects.filter(
+            pk__in=[old_group_id, instance.group_id]
+        ).values_list('slug', flat=True))
+    purge(*tags)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_timelines(sender, instance, **kwargs):
+    post_cache.invalidate(instance.pk)
+    counts.post_removed(instance)
+    timelines.remove_post('author', instance.author_id, instance.pk)
+    if instance.group_id:
+        timelines.remove_post('group', instance.group_id, instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_cards(sender, instance, **kwargs):
+    if kwargs['update_fields'] == frozenset({'last_login'}):
+        return
+    # карточки без ленты в кэше устареют сами через POST_CACHE_TIMEOUT
+    ids = timelines.cached_timeline('author', instance.pk)
+    if ids:
+        post_cache.invalidate(*ids)
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_cards(sender, instance, **kwargs):
+    ids = timelines.cached_timeline('group', instance.pk)
+    if ids:
+        post_cache.invalidate(*ids)
+
+
+@receiver(post_save, sender=Comment)
+def raise_hot_score(sender, instance, created, **kwargs):
+    if created:
+        ranking.comment_added(instance)
+
+
+@receiver(post_delete, sender=Post)
+def purge_deleted_post_pages(sender, instance, **kwargs):
+    tags = [LISTING_TAG, post_tag(instance.pk), author_tag(instance.author_id)]
+    if instance.group_id:
+        group = Group.objects.filter(pk=instance.group_id).first()
+        if group is not None:
+            tags.append(group_tag(group.slug))
+    purge(*tags)
+
+
+@receiver(post_save, sender=Comment)
+def purge_commented_post(sender, instance, created, **kwargs):
+    if created:
+        purge(post_tag(instance.post_id))
+
+
+@receiver(post_save, sender=User)
+def purge_author_pages(sender, instance, **kwargs):
+    if kwargs['update_fields'] != frozenset({'last_login'}):
+        purge(author_tag(instance.pk))
+
+
+@receiver(post_save, sender=Group)
+def purge_group_pages(sender, instance, **kwargs):
+    purge(group_tag(instance.slug))
@@ -0,0 +1,86 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.paginator import EstimatedCountPaginator
+
+from ..models import Comment, Follow, User, Group, Post
+
+
+class AdminChangelistTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='группа', description='описание', slug='group'
+        )
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+        # пользователь сессии кэшируется первым запросом (users.backends)
+        self.admin_client.get(reverse('admin:index'))
+
+    def create_rows(self, start, stop):
+        for i in range(start, stop):
+            author = User.objects.create_user(username=f'author_{i}')
+            group = Group.objects.create(
+                title=f'группа {i}', description='описание', slug=f'g_{i}'
+            )
+            post = Post.objects.create(text='текст', author=author,
+                                       group=group)
+            Comment.objects.create(post=post, author=self.user, text='да')
+            Follow.objects.create(user=self.user, author=author)
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:posts_{model}_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_no_distinct_dates_scan(self):
+        """Списки постов не перебирают даты всей таблицы."""
+        Post.objects.create(text='текст', author=self.user)
+        for model in ('post', 'archivedpost'):
+            url = reverse(f'admin:posts_{model}_changelist')
+            with CaptureQueriesContext(connection) as queries:
+                self.admin_client.get(url)
+            with self.subTest(model=model):
+                self.assertFalse([
+                    query['sql'] for query in queries
+                    if 'DISTINCT' in query['sql']
+                    and 'date_trunc' in query['sql']
+                ])
+
+    def test_queries_do_not_grow_with_rows(self):
+        """Число запросов списков не зависит от числа строк и групп."""
+        self.create_rows(0, 2)
+        expected = {
+            model: self.changelist_queries(model)
+            for model in ('post', 'comment', 'follow', 'group')
+        }
+        self.create_rows(2, 10)
+        for model, queries in expected.items():
+            with self.subTest(model=model):
+                self.assertEqual(self.changelist_queries(model), queries)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1)
+    def test_estimated_count(self):
+        """Без фильтров число строк оценивается, с фильтром - считается."""
+        posts = [
+            Post.objects.create(text='текст', author=self.user)
+            for _ in range(3)
+        ]
+        posts[1].delete()
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        self.assertEqual(paginator.count, 3)
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(author=self.user), 10
+        )
+        self.assertEqual(paginator.count, 2)
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Group, Post, User
+)
+
+
+@override_settings(BULK_BATCH_SIZE=4, ARCHIVE_AFTER_DAYS=30)
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='группа', description='описание', slug='group'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.old = [
+            Post.objects.create(
+                text=f'старый {i}', author=self.author, group=self.group
+            ) for i in range(7)
+        ]
+        for minutes, post in enumerate(self.old):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.now() - timedelta(days=60, minutes=-minutes),
+                image_color='#123456'
+            )
+        self.new = [
+            Post.objects.create(
+                text=f'новый {i}', author=self.author, group=self.group
+            ) for i in range(8)
+        ]
+        Comment.objects.create(post=self.old[0], author=self.reader,
+                               text='комментарий')
+        call_command('archive_posts', stdout=StringIO())
+
+    def page_ids(self, client, url, page):
+        response = client.get(url, {'page': page})
+        page_obj = response.context['page_obj']
+        return page_obj.paginator.count, [post.pk for post in page_obj]
+
+    def test_posts_moved_to_archive(self):
+        """Старые посты и их комментарии переносятся с теми же id."""
+        self.assertEqual(
+            set(Post.objects.values_list('pk', flat=True)),
+            {post.pk for post in self.new}
+        )
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('pk', flat=True)),
+            {post.pk for post in self.old}
+        )
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('image_color', flat=True)),
+            {'#123456'}
+        )
+        comment = ArchivedComment.objects.get()
+        self.assertEqual(comment.post_id, self.old[0].pk)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_listings_continue_with_archive(self):
+        """Списки читают рабочую таблицу, а дальние страницы - архив."""
+        expected = [post.pk for post in reversed(self.new)] + [
+            post.pk for post in reversed(self.old)
+        ]
+        for client, url in (
+            (self.guest_client, reverse('posts:index')),
+            (self.guest_client, reverse('posts:posts', args=['group'])),
+            (self.guest_client, reverse('posts:profile', args=['author'])),
+            (self.reader_client, reverse('posts:follow_index')),
+        ):
+            with self.subTest(url=url):
+                cache.clear()
+                count, first = self.page_ids(client, url, 1)
+                _, second = self.page_ids(client, url, 2)
+                self.assertEqual(count, 15)
+                self.assertEqual(first + second, expected)
+
+    def test_archived_post_detail(self):
+        """Архивный пост открывается по старой ссылке только для чтения."""
+        url = reverse('posts:post_detail', args=[self.old[0].pk])
+        response = self.reader_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['author_posts_count'], 15)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['комментарий']
+        )
+        self.assertNotContains(
+            response, reverse('posts:add_comment', args=[self.old[0].pk])
+        )
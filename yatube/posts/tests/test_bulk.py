@@ -0,0 +1,95 @@
+from django.contrib.admin import ACTION_CHECKBOX_NAME
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.jobs import DONE
+
+from ..counts import scope_count, total_count
+from ..models import Comment, User, Group, Post
+from ..timelines import get_timeline
+
+
+@override_settings(JOBS_EAGER=True, BULK_BATCH_SIZE=2)
+class BulkActionsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='группа', description='описание', slug='group'
+        )
+        cls.target = Group.objects.create(
+            title='цель', description='описание', slug='target'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+        self.spam = [
+            Post.objects.create(
+                text=f'спам {i}', author=self.spammer, group=self.group
+            ) for i in range(5)
+        ]
+        self.post = Post.objects.create(
+            text='пост', author=self.user, group=self.group
+        )
+        Comment.objects.create(post=self.post, author=self.spammer, text='да')
+
+    def run_action(self, action, posts, **data):
+        response = self.admin_client.post(
+            reverse('admin:posts_post_changelist'),
+            {'action': action, 'confirm': '1',
+             ACTION_CHECKBOX_NAME: [post.pk for post in posts], **data},
+            follow=True
+        )
+        message = str(list(response.context['messages'])[0])
+        job_url = message.rsplit(' ', 1)[1]
+        return self.admin_client.get(job_url).json()
+
+    def test_confirmation_page(self):
+        """Без подтверждения действие показывает промежуточную страницу."""
+        response = self.admin_client.post(
+            reverse('admin:posts_post_changelist'),
+            {'action': 'delete_by_author',
+             ACTION_CHECKBOX_NAME: [self.spam[0].pk]}
+        )
+        self.assertTemplateUsed(response, 'admin/posts/bulk_action.html')
+        self.assertEqual(Post.objects.count(), 6)
+
+    def test_move_to_group(self):
+        """Посты переносятся пачками, ленты и счётчики групп сброшены."""
+        get_timeline('group', self.group.pk)
+        self.assertEqual(scope_count('group', self.target.pk), 0)
+        status = self.run_action(
+            'move_to_group', self.spam, group=self.target.pk
+        )
+        self.assertEqual(status['status'], DONE)
+        self.assertEqual((status['done'], status['total']), (5, 5))
+        self.assertEqual(scope_count('group', self.target.pk), 5)
+        self.assertEqual(get_timeline('group', self.group.pk),
+                         [self.post.pk])
+
+    def test_delete_by_author(self):
+        """Удаляются все посты автора, но не его комментарии к чужим."""
+        Comment.objects.create(post=self.spam[1], author=self.user, text='a')
+        self.assertEqual(total_count(), 6)
+        status = self.run_action('delete_by_author', self.spam[:1])
+        self.assertEqual(status['done'], 5)
+        self.assertEqual(list(Post.objects.all()), [self.post])
+        self.assertEqual(total_count(), 1)
+        self.assertEqual(
+            list(Comment.objects.values_list('post_id', flat=True)),
+            [self.post.pk]
+        )
+
+    def test_purge_comments(self):
+        """Комментарии к выбранным постам удаляются."""
+        status = self.run_action('purge_comments', [self.post])
+        self.assertEqual(status['done'], 1)
+        self.assertFalse(Comment.objects.exists())
@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..counts import follow_count, scope_count, total_count
+from ..models import Follow, User, Group, Post
+from ..utils import CountedPaginator
+
+
+class CountsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='группа', description='описание', slug='group'
+        )
+        cls.other_group = Group.objects.create(
+            title='группа 2', description='описание', slug='group_2'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(3):
+            Post.objects.create(
+                text=f'текст {i}', author=cls.author, group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_counts_follow_signals(self):
+        """Счётчики меняются при создании, переносе и удалении поста."""
+        self.assertEqual(total_count(), 3)
+        self.assertEqual(scope_count('group', self.group.pk), 3)
+        self.assertEqual(follow_count(self.user), 3)
+        post = Post.objects.create(
+            text='новый', author=self.author, group=self.group
+        )
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(scope_count('group', self.group.pk), 3)
+        self.assertEqual(scope_count('group', self.other_group.pk), 1)
+        self.assertEqual(follow_count(self.user), 4)
+        post.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(total_count(), 3)
+            self.assertEqual(scope_count('author', self.author.pk), 3)
+            self.assertEqual(scope_count('group', self.other_group.pk), 0)
+
+    def test_listing_without_count_query(self):
+        """Повторный запрос ленты подписок не выполняет COUNT(*)."""
+        url = reverse('posts:follow_index')
+        self.authorized_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 3)
+        self.assertFalse(
+            [q for q in queries if 'COUNT(' in q['sql'].upper()]
+        )
+
+    def test_elided_page_range(self):
+        """Ссылки только на крайние и соседние страницы."""
+        paginator = CountedPaginator(range(200), 10)
+        self.assertEqual(
+            list(paginator.get_elided_page_range(10)),
+            [1, '…', 8, 9, 10, 11, 12, '…', 20]
+        )
+        page = CountedPaginator(range(200), 10, count=30).page(2)
+        self.assertEqual(page.paginator.num_pages, 3)
+        self.assertEqual(page.elided_page_range, [1, 2, 3])
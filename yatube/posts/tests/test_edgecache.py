@@ -0,0 +1,109 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from django.core.cache import cache
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
+from django.urls import reverse
+
+from core.edgecache import purger
+
+from ..models import Comment, User, Group, Post
+
+
+class StubProxy(BaseHTTPRequestHandler):
+    """Прокси-заглушка: запоминает ключи из запросов PURGE."""
+    purged = []
+
+    def do_PURGE(self):
+        self.purged.append(set(self.headers['Surrogate-Key'].split()))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class CachePolicyTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='группа', description='описание', slug='group'
+        )
+        cls.post = Post.objects.create(
+            text='текст', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_public_for_guests_private_for_users(self):
+        """Гостю ответ можно кэшировать на прокси, пользователю - нет."""
+        url = reverse('posts:posts', args=[self.group.slug])
+        response = self.guest_client.get(url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage=60', response['Cache-Control'])
+        self.assertIn('stale-while-revalidate=300', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+        self.assertEqual(
+            set(response['Surrogate-Key'].split()),
+            {'group-group', f'post-{self.post.pk}'}
+        )
+        response = self.authorized_client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_post_detail_keys(self):
+        """Страница поста помечена постом, автором и группой."""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(
+            set(response['Surrogate-Key'].split()),
+            {f'post-{self.post.pk}', f'author-{self.user.pk}', 'group-group'}
+        )
+
+
+class PurgeTest(TransactionTestCase):
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), StubProxy)
+        threading.Thread(target=self.server.serve_forever).start()
+        StubProxy.purged.clear()
+        url = f'http://127.0.0.1:{self.server.server_port}/'
+        override = override_settings(EDGE_PURGE_URL=url)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='user')
+        self.group = Group.objects.create(
+            title='группа', description='описание', slug='group'
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def purged(self):
+        purger.wait(5)
+        keys = set().union(*StubProxy.purged)
+        StubProxy.purged.clear()
+        return keys
+
+    def test_signals_purge_surrogate_keys(self):
+        """Новый пост, комментарий и удаление сбрасывают свои ключи."""
+        self.purged()
+        post = Post.objects.create(
+            text='текст', author=self.user, group=self.group
+        )
+        self.assertEqual(
+            self.purged(), {'posts', f'author-{self.user.pk}', 'group-group'}
+        )
+        Comment.objects.create(post=post, author=self.user, text='да')
+        self.assertEqual(self.purged(), {f'post-{post.pk}'})
+        post_id = post.pk
+        post.delete()
+        self.assertIn(f'post-{post_id}', self.purged())
@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 from http import HTTPStatus
@@ -72,12 +73,14 @@ class PostFormTest(TestCase):
         )
         self.assertEqual(Post.objects.count(), post_count + 1)
         self.assertEqual(response.status_code, HTTPStatus.OK)
+        # картинка сохраняется под хэшем содержимого
+        digest = hashlib.sha256(small_gif).hexdigest()
         self.assertTrue(
             Post.objects.filter(
                 text=form_data['text'],
                 group=form_data['group'],
                 author=self.user,
-                image='posts/small.gif'
+                image=f'posts/{digest[:2]}/{digest[2:4]}/{digest}.gif'
             ).exists()
         )
 
@@ -0,0 +1,218 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest.mock import ANY
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..images import generate_variants, variant_formats
+from ..models import (
+    ArchivedPost, Post, Thumbnail, User, post_image_storage
+)
+from ..thumbnails import resolve_thumbnails
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.TEST_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class RelocateImagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        for name, data in (('a.gif', b'one'), ('b.gif', b'one'),
+                           ('c.gif', b'two')):
+            with open(os.path.join(TEMP_MEDIA_ROOT, 'posts', name), 'wb') as f:
+                f.write(data)
+
+    def test_relocate_images(self):
+        """Старые файлы переносятся по хэшу, пути постов обновляются."""
+        posts = [
+            Post.objects.create(text='пост', author=self.user, image=image)
+            for image in ('posts/a.gif', 'posts/b.gif', 'posts/a.gif',
+                          'posts/missing.gif')
+        ]
+        archived = ArchivedPost.objects.create(
+            id=1000, text='архив', author=self.user, image='posts/c.gif',
+            pub_date=posts[0].pub_date
+        )
+        call_command('relocate_images', '--batch-size', '2',
+                     stdout=StringIO())
+        names = [Post.objects.get(pk=post.pk).image.name for post in posts]
+        self.assertTrue(post_image_storage.is_content_name(names[0]))
+        # одинаковое содержимое - один файл
+        self.assertEqual(names[0], names[1])
+        self.assertEqual(names[0], names[2])
+        self.assertEqual(names[3], 'posts/missing.gif')
+        archived.refresh_from_db()
+        self.assertTrue(
+            post_image_storage.is_content_name(archived.image.name)
+        )
+        for old in ('a.gif', 'b.gif', 'c.gif'):
+            self.assertFalse(post_image_storage.exists(f'posts/{old}'))
+        with post_image_storage.open(names[0]) as file:
+            self.assertEqual(file.read(), b'one')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_VARIANT_WIDTHS=(40, 80),
+                   IMAGE_VARIANT_ASPECT=2)
+class ImageVariantsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        buffer = BytesIO()
+        Image.new('RGB', (120, 100), 'red').save(buffer, 'JPEG')
+        self.post = Post.objects.create(
+            text='пост', author=self.user,
+            image=SimpleUploadedFile('photo.jpg', buffer.getvalue())
+        )
+
+    def test_variants_generated(self):
+        """Все ширины и форматы создаются с пропорциями карточки."""
+        generate_variants(self.post.pk)
+        variants = list(self.post.image_variants.all())
+        self.assertEqual(
+            {(v.format, v.width, v.height) for v in variants},
+            {(name, width, width // 2)
+             for name in variant_formats() for width in (40, 80)}
+        )
+        with Image.open(variants[0].image) as image:
+            self.assertEqual(image.size, (40, 20))
+
+    def test_no_upscale(self):
+        """Ширины больше исходной картинки не создаются."""
+        with override_settings(IMAGE_VARIANT_WIDTHS=(40, 80, 400)):
+            generate_variants(self.post.pk)
+        self.assertEqual(
+            sorted(set(self.post.image_variants.values_list(
+                'width', flat=True
+            ))),
+            [40, 80]
+        )
+
+    def test_card_has_picture_sources(self):
+        """Карточка строит srcset из таблицы вариантов."""
+        generate_variants(self.post.pk)
+        response = self.client.get(reverse('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertIn(('image/jpeg', ANY), post.image_sources)
+        srcset = dict(post.image_sources)['image/jpeg']
+        self.assertRegex(srcset, r'^/media/posts/variants/\S+ 40w, '
+                                 r'/media/posts/variants/\S+ 80w$')
+        self.assertTrue(post.thumb_url.startswith('/media/posts/variants/'))
+        self.assertContains(response, '<picture>')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailResolverTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.posts = []
+        for color in ('red', 'blue'):
+            buffer = BytesIO()
+            Image.new('RGB', (100, 100), color).save(buffer, 'JPEG')
+            self.posts.append(Post.objects.create(
+                text='пост', author=self.user,
+                image=SimpleUploadedFile('photo.jpg', buffer.getvalue())
+            ))
+
+    def test_resolved_once_then_batched(self):
+        """Миниатюры создаются один раз, потом читаются пачкой."""
+        images = [post.image for post in self.posts]
+        urls = resolve_thumbnails(images)
+        self.assertEqual(len(set(urls.values())), 2)
+        self.assertEqual(Thumbnail.objects.count(), 2)
+        cache.clear()
+        # без обращений к sorl: один запрос к таблице Thumbnail
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_thumbnails(images), urls)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_thumbnails(images), urls)
+
+    def test_post_detail_uses_resolved_url(self):
+        """Страница поста показывает миниатюру из таблицы."""
+        url = resolve_thumbnails([self.posts[0].image])[
+            self.posts[0].image.name
+        ]
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.posts[0].pk])
+        )
+        self.assertContains(response, f'src="{url}"')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageMetadataTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        buffer = BytesIO()
+        Image.new('RGB', (120, 80), (255, 0, 0)).save(buffer, 'PNG')
+        self.data = buffer.getvalue()
+
+    def test_metadata_computed_on_upload(self):
+        """Цвет заглушки считается при загрузке через форму."""
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'пост',
+            'image': SimpleUploadedFile('photo.png', self.data),
+        })
+        post = Post.objects.get()
+        self.assertEqual(post.image_color, '#ff0000')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'background-color: #ff0000')
+
+    def test_metadata_backfilled_with_variants(self):
+        """Для старых постов цвет досчитывается вместе с вариантами."""
+        post = Post.objects.create(
+            text='пост', author=self.user,
+            image=SimpleUploadedFile('photo.png', self.data)
+        )
+        generate_variants(post.pk)
+        post.refresh_from_db()
+        self.assertEqual(post.image_color, '#ff0000')
@@ -0,0 +1,106 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.access import access_counter
+
+from ..models import User, Post
+
+
+class PublicCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.first = User.objects.create_user(username='first')
+        cls.second = User.objects.create_user(username='second')
+        cls.post = Post.objects.create(text='старый пост', author=cls.first)
+
+    def setUp(self):
+        # обращения из других тестов не должны попасть в статистику
+        access_counter.flush()
+        cache.clear()
+        self.guest_client = Client()
+
+    def client_for(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def test_guest_page_ignores_cookies(self):
+        """Гости с разными cookies получают одну страницу из кэша."""
+        self.guest_client.get(reverse('posts:index'))
+        Post.objects.create(text='новый пост', author=self.first)
+        self.guest_client.cookies['theme'] = 'dark'
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertIsNone(response.context)
+        self.assertNotContains(response, 'новый пост')
+
+    def test_users_share_post_list_not_header(self):
+        """Список постов общий, шапка у каждого пользователя своя."""
+        url = reverse('posts:index')
+        self.client_for(self.first).get(url)
+        Post.objects.create(text='новый пост', author=self.first)
+        response = self.client_for(self.second).get(url)
+        self.assertContains(response, 'Пользователь: second')
+        self.assertNotContains(response, 'новый пост')
+        self.assertContains(response, 'старый пост')
+
+    def test_fragment_hit_skips_post_queries(self):
+        """При попадании во фрагмент посты страницы не читаются."""
+        url = reverse('posts:index')
+        client = self.client_for(self.first)
+        client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertContains(response, 'старый пост')
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        self.assertFalse(
+            [query for query in queries if 'posts_post' in query['sql']]
+        )
+        self.assertIn(f'post-{self.post.pk}', response['Surrogate-Key'])
+
+    @override_settings(HTML_MINIFY=True)
+    def test_fragment_minified_once(self):
+        """Минифицируется только фрагмент и только при записи в кэш."""
+        url = reverse('posts:index')
+        client = self.client_for(self.first)
+        with mock.patch('core.minify.minify_html') as page_minify, \
+                mock.patch('posts.utils.minify_html',
+                           side_effect=lambda html: html) as fragment_minify:
+            client.get(url)
+            response = client.get(url)
+        page_minify.assert_not_called()
+        fragment_minify.assert_called_once()
+        self.assertContains(response, 'старый пост')
+
+    @override_settings(STREAMING_RENDER=True)
+    def test_guest_page_cached_with_streaming_render(self):
+        """При потоковой отрисовке страница гостя всё равно кэшируется."""
+        url = reverse('posts:index')
+        response = self.guest_client.get(url)
+        self.assertFalse(response.streaming)
+        Post.objects.create(text='новый пост', author=self.first)
+        response = self.guest_client.get(url)
+        self.assertIsNone(response.context)
+        self.assertContains(response, 'старый пост')
+        self.assertNotContains(response, 'новый пост')
+
+    def test_hit_ratio_per_user_class(self):
+        """page_cache_stats считает попадания гостей и пользователей."""
+        url = reverse('posts:index')
+        user_client = self.client_for(self.first)
+        for _ in range(2):
+            self.guest_client.get(url)
+            user_client.get(url)
+        out = StringIO()
+        call_command('page_cache_stats', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertIn('50.0%', lines[0])
+        self.assertTrue(lines[0].startswith('anonymous'))
+        self.assertIn('50.0%', lines[1])
@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import User, Group, Post
+from ..encoding import decode_card, encode_card, pack_ids, unpack_ids
+from ..post_cache import from_card, post_cache, to_card
+
+
+class PostCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='user', first_name='Имя', last_name='Фамилия'
+        )
+        cls.group = Group.objects.create(
+            title='группа', description='описание', slug='group'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'текст {i}', author=cls.user, group=cls.group
+            ) for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_cards_restored_as_posts(self):
+        """Посты из кэша равны постам из базы со связанными объектами."""
+        ids = [post.pk for post in self.posts]
+        post_cache.get_many(ids)
+        with self.assertNumQueries(0):
+            posts = post_cache.get_many(ids)
+            self.assertEqual(posts, self.posts)
+            self.assertEqual(posts[0].author.get_full_name(), 'Имя Фамилия')
+            self.assertEqual(posts[0].group.slug, self.group.slug)
+
+    def test_misses_filled_with_one_query(self):
+        """Отсутствующие в кэше посты читаются одним запросом."""
+        post_cache.get_many([self.posts[0].pk])
+        with self.assertNumQueries(1):
+            post_cache.get_many([post.pk for post in self.posts])
+
+    def test_post_edit_invalidates_card(self):
+        """После редактирования в списке виден новый текст."""
+        url = reverse('posts:posts', kwargs={'slug': self.group.slug})
+        self.authorized_client.get(url)
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=[self.posts[0].pk]),
+            {'text': 'новый текст', 'group': self.group.pk}
+        )
+        response = self.authorized_client.get(url)
+        self.assertIn('новый текст', response.content.decode())
+
+    def test_compact_encoding_round_trip(self):
+        """Карточка и лента переживают упаковку без потерь."""
+        post = Post.objects.create(text='без группы', author=self.user)
+        card = to_card(post)
+        restored = decode_card(encode_card(card))
+        self.assertEqual(restored, card)
+        self.assertEqual(restored.pub_date, post.pub_date)
+        self.assertIsNone(from_card(restored).group)
+        for ids in ([], [post.pk for post in self.posts], [70000, 3]):
+            self.assertEqual(unpack_ids(pack_ids(ids)), ids)
+        self.assertEqual(len(pack_ids([70000, 3])), 1 + 4 * 2)
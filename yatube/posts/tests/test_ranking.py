@@ -0,0 +1,88 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, User, Group, Post
+
+
+class RankingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.popular = User.objects.create_user(username='popular')
+        cls.group = Group.objects.create(
+            title='группа', description='описание', slug='group'
+        )
+        Follow.objects.create(user=cls.user, author=cls.popular)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def hot_ids(self, url):
+        # страница гостя кэшируется целиком
+        cache.clear()
+        response = self.guest_client.get(url)
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_comments_and_reach_raise_post(self):
+        """Комментарии и подписчики автора поднимают пост в рейтинге."""
+        old = Post.objects.create(
+            text='старый', author=self.user, group=self.group
+        )
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=old.pub_date - timedelta(hours=1)
+        )
+        new = Post.objects.create(text='новый', author=self.user)
+        followed = Post.objects.create(text='охват', author=self.popular)
+        self.assertEqual(
+            self.hot_ids(reverse('posts:hot_index')),
+            [followed.pk, new.pk, old.pk]
+        )
+        for _ in range(3):
+            self.authorized_client.post(
+                reverse('posts:add_comment', args=[old.pk]),
+                {'text': 'комментарий'}
+            )
+        self.assertEqual(
+            self.hot_ids(reverse('posts:hot_index'))[0], old.pk
+        )
+        self.assertEqual(
+            self.hot_ids(reverse('posts:group_hot', args=[self.group.slug])),
+            [old.pk]
+        )
+
+    def test_rebuild_matches_incremental_scores(self):
+        """Пересчёт командой совпадает с накопленным рейтингом."""
+        post = Post.objects.create(text='текст', author=self.popular)
+        Comment.objects.create(post=post, author=self.user, text='да')
+        expected = Post.objects.get(pk=post.pk).hot_score
+        Post.objects.update(hot_score=0)
+        call_command('rebuild_hot_scores', stdout=StringIO())
+        self.assertAlmostEqual(
+            Post.objects.get(pk=post.pk).hot_score, expected, places=6
+        )
+
+    def test_rebuild_matches_with_many_comments(self):
+        """Векторный пересчёт складывает комментарии каждого поста."""
+        posts = [
+            Post.objects.create(text=f'пост {i}', author=author)
+            for i, author in enumerate((self.user, self.popular, self.user))
+        ]
+        for count, post in zip((3, 0, 5), posts):
+            for _ in range(count):
+                Comment.objects.create(post=post, author=self.user, text='да')
+        expected = dict(Post.objects.values_list('pk', 'hot_score'))
+        Post.objects.update(hot_score=0)
+        call_command('rebuild_hot_scores', '--batch-size', '2',
+                     stdout=StringIO())
+        for pk, score in Post.objects.values_list('pk', 'hot_score'):
+            with self.subTest(pk=pk):
+                self.assertAlmostEqual(score, expected[pk], places=6)
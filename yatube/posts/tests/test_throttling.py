@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.throttling import SlidingWindow
+from ..models import User, Comment, Post
+
+
+@override_settings(THROTTLE_RATES={'comment': '2/m', 'follow': '1/m'})
+class ThrottleTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Тестовый текст', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_add_comment_throttled(self):
+        """Лишний комментарий получает 429 с Retry-After."""
+        url = reverse('posts:add_comment', args=[self.post.id])
+        for _ in range(2):
+            response = self.authorized_client.post(url, {'text': 'текст'})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.authorized_client.post(url, {'text': 'текст'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_limit_is_per_user(self):
+        """Лимит считается отдельно для каждого пользователя."""
+        url = reverse('posts:profile_follow', args=[self.author.username])
+        self.authorized_client.get(url)
+        other_client = Client()
+        other_client.force_login(self.author)
+        response = other_client.get(
+            reverse('posts:profile_follow', args=[self.user.username])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    def test_sliding_window_uses_previous_window(self):
+        """Запросы прошлого окна учитываются пропорционально."""
+        limiter = SlidingWindow('test', '2/m')
+        self.assertEqual(limiter.hit('ip:1', now=60 * 100 + 50), 0)
+        self.assertEqual(limiter.hit('ip:1', now=60 * 100 + 55), 0)
+        # начало следующего окна: почти весь прошлый счётчик ещё в силе
+        self.assertGreater(limiter.hit('ip:1', now=60 * 101 + 1), 0)
+        # к концу окна доля прошлого почти исчезла
+        limiter.hit('ip:2', now=60 * 100 + 50)
+        limiter.hit('ip:2', now=60 * 100 + 55)
+        self.assertEqual(limiter.hit('ip:2', now=60 * 101 + 50), 0)
@@ -0,0 +1,115 @@
+from io import StringIO
+from threading import Thread
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import User, Group, Post
+from .. import timelines
+from ..timelines import (
+    cached_timeline, get_timeline, push_post, store_timeline, timeline_key
+)
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='группа', description='описание', slug='group'
+        )
+        cls.other_group = Group.objects.create(
+            title='группа 2', description='описание', slug='group_2'
+        )
+        cls.post = Post.objects.create(
+            text='текст', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def group_page(self, group):
+        return self.guest_client.get(
+            reverse('posts:posts', kwargs={'slug': group.slug})
+        ).context['page_obj']
+
+    def test_new_post_pushed_to_cached_timelines(self):
+        """Новый пост попадает в начало закэшированных лент."""
+        get_timeline('group', self.group.pk)
+        get_timeline('author', self.user.pk)
+        post = Post.objects.create(
+            text='новый', author=self.user, group=self.group
+        )
+        self.assertEqual(
+            cached_timeline('group', self.group.pk),
+            [post.pk, self.post.pk]
+        )
+        self.assertEqual(
+            cached_timeline('author', self.user.pk)[0], post.pk
+        )
+
+    def test_concurrent_pushes_keep_both_posts(self):
+        """Пока лента заблокирована, второй пост ждёт и не теряется."""
+        store_timeline('group', self.group.pk, [1])
+        with timelines.timeline_lock('group', self.group.pk):
+            thread = Thread(target=push_post, args=('group', self.group.pk, 3))
+            thread.start()
+            ids = cached_timeline('group', self.group.pk)
+            store_timeline('group', self.group.pk, [2, *ids])
+        thread.join()
+        self.assertEqual(cached_timeline('group', self.group.pk), [3, 2, 1])
+
+    def test_lock_timeout_drops_timeline(self):
+        """Если блокировку не дали, лента сбрасывается, а не теряет пост."""
+        store_timeline('group', self.group.pk, [1])
+        cache.add(f'{timeline_key("group", self.group.pk)}:lock', 'x')
+        with mock.patch.object(timelines, 'TIMELINE_LOCK_TIMEOUT', 0):
+            push_post('group', self.group.pk, 2)
+        self.assertIsNone(cached_timeline('group', self.group.pk))
+
+    def test_group_change_and_delete(self):
+        """Смена группы и удаление поста обновляют ленты."""
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(self.group_page(self.group).paginator.count, 1)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.group_page(self.group).paginator.count, 0)
+        self.assertEqual(list(self.group_page(self.other_group)), [post])
+        post.delete()
+        self.assertEqual(
+            self.group_page(self.other_group).paginator.count, 0
+        )
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_pages_beyond_timeline_from_database(self):
+        """Страницы за пределами ленты читаются из базы."""
+        Post.objects.bulk_create(
+            Post(text=f'текст {i}', author=self.user, group=self.group)
+            for i in range(3)
+        )
+        response = self.guest_client.get(
+            reverse('posts:posts', kwargs={'slug': self.group.slug}),
+            {'page': 1}
+        )
+        self.assertEqual(response.context['page_obj'].paginator.count, 4)
+
+    def test_check_timelines_fixes_stale_cache(self):
+        """check_timelines --fix перестраивает устаревшую ленту."""
+        store_timeline('group', self.group.pk, [self.post.pk + 1])
+        out = StringIO()
+        call_command('check_timelines', '--fix', stdout=out)
+        self.assertIn(timeline_key('group', self.group.pk), out.getvalue())
+        self.assertEqual(
+            cached_timeline('group', self.group.pk), [self.post.pk]
+        )
+
+    def test_check_timelines_passes_system_checks(self):
+        """check_timelines запускается с системными проверками, как из CLI."""
+        out = StringIO()
+        call_command('check_timelines', skip_checks=False, stdout=out)
+        self.assertIn('group: проверено', out.getvalue())
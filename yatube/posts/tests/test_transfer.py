@@ -0,0 +1,161 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..counts import scope_count
+from ..models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Group, Post, User
+)
+from ..timelines import get_timeline
+
+TEMP_DIR = tempfile.mkdtemp()
+
+
+@override_settings(BULK_BATCH_SIZE=3)
+class TransferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='группа', description='описание', slug='group'
+        )
+        cls.other = Group.objects.create(
+            title='другая', description='описание', slug='other'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(
+                text=f'пост {i}', author=self.author, group=self.group
+            ) for i in range(4)
+        ]
+        self.other_post = Post.objects.create(
+            text='чужой', author=self.reader, group=self.other
+        )
+        Comment.objects.create(post=self.posts[0], author=self.reader,
+                               text='комментарий')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.path = os.path.join(TEMP_DIR, 'posts.ndjson.gz')
+
+    def export(self, *args):
+        call_command('export_posts', self.path, *args, stdout=StringIO())
+
+    def test_export_filters(self):
+        """В выгрузку попадают посты группы и всё, что с ними связано."""
+        out = StringIO()
+        call_command('export_posts', '--group', 'group', stdout=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        kinds = [record['type'] for record in records]
+        self.assertEqual(kinds.count('post'), 4)
+        self.assertEqual(kinds.count('comment'), 1)
+        self.assertEqual(kinds.count('follow'), 1)
+        self.assertEqual(
+            {r['username'] for r in records if r['type'] == 'user'},
+            {'author', 'reader'}
+        )
+        # пользователь выгружается раньше записей, которые на него ссылаются
+        self.assertLess(kinds.index('user'), kinds.index('post'))
+
+    def test_import_restores_posts(self):
+        """Загрузка восстанавливает посты с датами, комментарии и подписки."""
+        dates = {post.pk: post.pub_date for post in self.posts}
+        self.export('--group', 'group')
+        self.assertEqual(get_timeline('group', self.group.pk),
+                         [post.pk for post in reversed(self.posts)])
+        Post.objects.filter(group=self.group).delete()
+        Follow.objects.all().delete()
+        call_command('import_posts', self.path, stdout=StringIO())
+        self.assertEqual(
+            {post.pk: post.pub_date
+             for post in Post.objects.filter(group=self.group)},
+            dates
+        )
+        self.assertEqual(Comment.objects.get().post_id, self.posts[0].pk)
+        self.assertTrue(
+            Follow.objects.filter(user=self.reader, author=self.author)
+            .exists()
+        )
+        self.assertEqual(scope_count('group', self.group.pk), 4)
+        self.assertEqual(len(get_timeline('group', self.group.pk)), 4)
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+
+    def test_archive_exported_and_restored(self):
+        """Архивные посты и комментарии выгружаются и загружаются в архив."""
+        archived = ArchivedPost.objects.create(
+            id=self.other_post.pk + 100, text='архивный', author=self.author,
+            group=self.group, pub_date=self.posts[0].pub_date
+        )
+        ArchivedComment.objects.create(
+            id=1000, post=archived, author=self.reader, text='старый',
+            created=archived.pub_date
+        )
+        out = StringIO()
+        call_command('export_posts', '--group', 'group', '--no-archive',
+                     stdout=out)
+        self.assertNotIn('архивный', out.getvalue())
+        self.export('--group', 'group')
+        ArchivedPost.objects.all().delete()
+        out = StringIO()
+        call_command('import_posts', self.path, stdout=out)
+        self.assertIn('post: 1, comment: 1', out.getvalue())
+        restored = ArchivedPost.objects.get()
+        self.assertEqual(
+            (restored.pk, restored.text), (archived.pk, 'архивный')
+        )
+        self.assertEqual(restored.comments.get().pk, 1000)
+        self.assertEqual(Post.objects.count(), 5)
+
+    def test_import_resumes_from_checkpoint(self):
+        """Загрузка продолжается с контрольной точки без дублей."""
+        self.export('--author', 'author', '--no-follows')
+        with open(f'{self.path}.checkpoint', 'w') as file:
+            json.dump({'line': 3}, file)
+        out = StringIO()
+        call_command('import_posts', self.path, stdout=out)
+        self.assertIn('Продолжаем со строки 4', out.getvalue())
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_import_remaps_taken_ids(self):
+        """Посты с занятыми id получают новые id вместе с комментариями."""
+        self.export('--group', 'group', '--no-follows')
+        Post.objects.filter(group=self.group).update(text='занято')
+        out = StringIO()
+        call_command('import_posts', self.path, stdout=out)
+        self.assertIn('post: 4, comment: 1', out.getvalue())
+        self.assertEqual(Post.objects.count(), 9)
+        self.assertEqual(
+            Comment.objects.filter(post=self.posts[0]).count(), 1
+        )
+        comment = Comment.objects.exclude(post=self.posts[0]).get()
+        self.assertEqual(comment.post.text, 'пост 0')
+
+        # повторная загрузка находит посты под новыми id
+        deleted = comment.pk
+        comment.delete()
+        with gzip.open(self.path, 'rt', encoding='utf-8') as file:
+            kinds = [json.loads(line)['type'] for line in file]
+        with open(f'{self.path}.checkpoint', 'w') as file:
+            json.dump({'line': kinds.index('comment')}, file)
+        out = StringIO()
+        call_command('import_posts', self.path, stdout=out)
+        self.assertIn('post: 0, comment: 1', out.getvalue())
+        self.assertEqual(Post.objects.count(), 9)
+        self.assertEqual(
+            Comment.objects.get(pk__gt=deleted).post.text, 'пост 0'
+        )
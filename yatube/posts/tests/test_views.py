@@ -1,7 +1,7 @@
 from django import forms
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.conf import settings
 
@@ -140,6 +140,8 @@ class PaginatorViewsTest(TestCase):
                  author=cls.user,
                  group=cls.group) for i in range(sort_test_post)]
         Post.objects.bulk_create(list_post)
+        # bulk_create не отправляет сигналы, обновляющие ленты
+        cache.clear()
         cls.authorized_client = Client()
         cls.authorized_client.force_login(cls.user)
 
@@ -210,3 +212,35 @@ class FollowViewTest(TestCase):
         response = self.author_client.get(
             self.url_follow_index)
         self.assertNotIn(self.post, response.context['page_obj'].object_list)
+
+
+@override_settings(STREAMING_RENDER=True)
+class StreamingRenderTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        Post.objects.bulk_create(
+            Post(text=f'текст {i}', author=cls.user) for i in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_listing_streamed(self):
+        """Страница отдаётся потоком: шапка, карточки, пагинатор."""
+        response = self.authorized_client.get(
+            reverse('posts:profile', kwargs={'username': self.user})
+        )
+        self.assertTrue(response.streaming)
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertIn('<header>', chunks[0])
+        self.assertNotIn('текст', chunks[0])
+        content = ''.join(chunks)
+        self.assertEqual(content.count('<hr>'), 2)
+        for i in range(3):
+            self.assertIn(f'текст {i}', content)
+        self.assertIn('</html>', chunks[-1])
+        self.assertEqual(len(response.context['page_obj']), 3)
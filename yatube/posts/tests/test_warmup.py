@@ -0,0 +1,63 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.signals import request_finished, request_started
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from core.access import access_counter
+
+from ..models import User, Group, Post
+from ..timelines import cached_timeline
+from ..warmup import warm, warm_targets
+
+
+class WarmupTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='user')
+        self.groups = [
+            Group.objects.create(
+                title=f'группа {i}', description='описание', slug=f'group_{i}'
+            ) for i in range(3)
+        ]
+        for group in self.groups:
+            Post.objects.create(text='текст', author=self.user, group=group)
+        # обращения из других тестов не должны попасть в статистику
+        access_counter.flush()
+        cache.clear()
+
+    def test_targets_ranked_by_visits(self):
+        """Группы упорядочены по числу посещений, прогрев не считается."""
+        client = Client()
+        for _ in range(2):
+            client.get(reverse('posts:posts', args=['group_2']))
+        client.get(
+            reverse('posts:posts', args=['group_1']),
+            HTTP_X_CACHE_WARMER='1'
+        )
+        access_counter.flush()
+        self.assertEqual(access_counter.top('posts:posts', 3), ['group_2'])
+        urls = warm_targets(groups=2, profiles=1)
+        self.assertEqual(urls[2], reverse('posts:posts', args=['group_2']))
+        self.assertEqual(len(urls), 5)
+
+    def test_warm_cache_command(self):
+        """Команда заполняет ленты групп и профилей в несколько потоков."""
+        out = StringIO()
+        call_command('warm_cache', '--concurrency', '2', stdout=out)
+        self.assertIn('Прогрето 6 страниц', out.getvalue())
+        for group in self.groups:
+            self.assertIsNotNone(cached_timeline('group', group.pk))
+        self.assertIsNotNone(cached_timeline('author', self.user.pk))
+
+    def test_connection_signals_stay_connected(self):
+        """Прогрев не отключает close_old_connections у других потоков."""
+        with mock.patch.object(request_started, 'disconnect') as started, \
+                mock.patch.object(request_finished, 'disconnect') as finished:
+            statuses = warm([reverse('posts:index')], concurrency=1)
+        self.assertEqual(list(statuses.values()), [200])
+        started.assert_not_called()
+        finished.assert_not_called()
@@ -0,0 +1,77 @@
+"""Адреса миниатюр sorl-thumbnail для целой страницы сразу.
+
+get_thumbnail и тег {% thumbnail %} для каждой картинки обращаются к
+key-value store sorl (кэш, при промахе - база) и к хранилищу файлов.
+Здесь адреса миниатюр всех картинок страницы берутся одним
+cache.get_many, промахи - одним запросом к таблице Thumbnail, и только
+картинки, у которых миниатюры ещё нет, проходят через sorl. Имя
+картинки в core.storage.ContentAddressedStorage зависит от содержимого,
+поэтому найденный однажды адрес не устаревает.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from sorl.thumbnail import get_thumbnail
+
+from .models import Thumbnail
+
+logger = logging.getLogger(__name__)
+
+# размер миниатюры в posts/includes/post.html и posts/post_detail.html
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+def thumbnail_key(name):
+    digest = hashlib.md5(name.encode()).hexdigest()
+    return f'thumbnail:{THUMBNAIL_GEOMETRY}:{digest}'
+
+
+def create_thumbnail(image):
+    try:
+        return get_thumbnail(
+            image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS
+        ).url
+    except Exception:
+        # как и тег {% thumbnail %}, не роняем страницу из-за картинки
+        logger.exception('Не удалось создать миниатюру %s', image)
+        return ''
+
+
+def resolve_thumbnails(images):
+    """Словарь имя картинки -> адрес миниатюры для FieldFile images."""
+    images = {image.name: image for image in images if image}
+    if not images:
+        return {}
+    keys = {thumbnail_key(name): name for name in images}
+    urls = {keys[key]: url for key, url in cache.get_many(keys).items()}
+    missing = [name for name in images if name not in urls]
+    if missing:
+        found = dict(Thumbnail.objects.filter(
+            geometry=THUMBNAIL_GEOMETRY, source__in=missing
+        ).values_list('source', 'url'))
+        created = {}
+        for name in missing:
+            if name not in found:
+                url = create_thumbnail(images[name])
+                if url:
+                    created[name] = url
+        Thumbnail.objects.bulk_create((
+            Thumbnail(source=name, geometry=THUMBNAIL_GEOMETRY, url=url)
+            for name, url in created.items()
+        ), ignore_conflicts=True)
+        found.update(created)
+        cache.set_many(
+            {thumbnail_key(name): url for name, url in found.items()},
+            settings.THUMBNAIL_URL_TIMEOUT
+        )
+        urls.update(found)
+    return urls
+
+
+def thumbnail_url(image):
+    if not image:
+        return ''
+    return resolve_thumbnails([image]).get(image.name, '')
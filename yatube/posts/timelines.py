@@ -0,0 +1,215 @@
+"""Ленты групп и авторов: списки id постов в кэше.
+
+Лента - это не больше settings.TIMELINE_LENGTH id постов, от новых к
+старым. Страница ленты получается срезом списка и posts.post_cache, без
+сортировки и COUNT(*) по таблице постов. Сигналы posts.signals
+обновляют уже закэшированные ленты при создании, смене группы и
+удалении поста; отсутствующая лента строится при первом обращении.
+
+bulk_create() и QuerySet.update() сигналов не отправляют: после них
+ленты нужно перестроить командой ``check_timelines --fix``.
+
+Добавление и удаление поста - это чтение, правка и запись списка, и
+два одновременных изменения одной ленты потеряли бы одно из них.
+Поэтому правка идёт под блокировкой в кэше (cache.add); если её не
+удалось взять за TIMELINE_LOCK_TIMEOUT, лента сбрасывается.
+
+В кэше лента хранится упакованными id (posts.encoding.pack_ids): это
+2-4 байта на пост вместо pickle списка целых.
+
+В ленту попадают только посты рабочей таблицы; страницы за её концом
+продолжаются архивными постами (posts.archive).
+"""
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+
+from users.models import UserDeletion
+
+from .counts import SCOPES, scope_count
+from .encoding import pack_ids, unpack_ids
+from .models import ArchivedPost, Post
+from .post_cache import post_cache
+from .utils import (
+    CountedPaginator, PartitionedPosts, count_authors, exclude_authors
+)
+
+# сколько секунд ждать блокировку ленты; столько же она живёт, если
+# поток упал, не сняв её
+TIMELINE_LOCK_TIMEOUT = 2
+TIMELINE_LOCK_POLL = 0.005
+
+
+def timeline_key(scope, pk):
+    return f'timeline:{scope}:{pk}'
+
+
+def scope_queryset(scope, pk, model=Post):
+    return model.objects.filter(**{SCOPES[scope]: pk})
+
+
+def build_timeline(scope, pk):
+    ids = list(scope_queryset(scope, pk).values_list('id', flat=True)[
+        :settings.TIMELINE_LENGTH
+    ])
+    store_timeline(scope, pk, ids)
+    return ids
+
+
+def store_timeline(scope, pk, ids):
+    cache.set(
+        timeline_key(scope, pk), pack_ids(ids), settings.TIMELINE_TIMEOUT
+    )
+
+
+def drop_timeline(scope, pk):
+    cache.delete(timeline_key(scope, pk))
+
+
+def cached_timeline(scope, pk):
+    data = cache.get(timeline_key(scope, pk))
+    return None if data is None else unpack_ids(data)
+
+
+def get_timeline(scope, pk):
+    ids = cached_timeline(scope, pk)
+    if ids is None:
+        ids = build_timeline(scope, pk)
+    return ids
+
+
+@contextmanager
+def timeline_lock(scope, pk):
+    """Блокирует правку ленты; отдаёт False, если блокировку не дали."""
+    key = f'{timeline_key(scope, pk)}:lock'
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + TIMELINE_LOCK_TIMEOUT
+    while not cache.add(key, token, TIMELINE_LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            yield False
+            return
+        time.sleep(TIMELINE_LOCK_POLL)
+    try:
+        yield True
+    finally:
+        # блокировка могла истечь и достаться другому потоку
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+def update_timeline(scope, pk, change):
+    """Применяет change(ids) к закэшированной ленте под блокировкой.
+
+    change возвращает новый список или None, если ленту надо сбросить.
+    """
+    with timeline_lock(scope, pk) as locked:
+        if not locked:
+            drop_timeline(scope, pk)
+            return
+        ids = cached_timeline(scope, pk)
+        if ids is None:
+            return
+        ids = change(ids)
+        if ids is None:
+            drop_timeline(scope, pk)
+        else:
+            store_timeline(scope, pk, ids)
+
+
+def push_post(scope, pk, post_id):
+    def push(ids):
+        if ids and ids[0] >= post_id:
+            # новый пост не может быть старше головы ленты: лента устарела
+            return None
+        return [post_id, *ids][:settings.TIMELINE_LENGTH]
+
+    update_timeline(scope, pk, push)
+
+
+def remove_post(scope, pk, post_id):
+    def remove(ids):
+        if post_id not in ids:
+            return ids
+        if len(ids) >= settings.TIMELINE_LENGTH:
+            # на освободившееся место должен встать пост из базы
+            return None
+        ids.remove(post_id)
+        return ids
+
+    update_timeline(scope, pk, remove)
+
+
+class TimelinePaginator(CountedPaginator):
+    """Paginator, который берёт страницы из ленты, а не из queryset.
+
+    Если лента заполнена до TIMELINE_LENGTH, в базе могут быть более
+    старые посты, а за ними - архивные: страницы за пределами ленты
+    берутся из PartitionedPosts, а общее число постов - из posts.counts.
+    Посты мягко удалённых пользователей убираются из ленты и из чисел
+    до нарезки на страницы.
+    """
+
+    def __init__(self, scope, pk, per_page):
+        super().__init__(scope_queryset(scope, pk), per_page)
+        self.scope = scope
+        self.pk = pk
+        self.hidden = UserDeletion.objects.hidden_ids()
+        ids = get_timeline(scope, pk)
+        self.truncated = len(ids) >= settings.TIMELINE_LENGTH
+        self.hidden_ids = set()
+        if self.hidden:
+            self.hidden_ids = set(self.object_list.filter(
+                author_id__in=self.hidden
+            ).values_list('id', flat=True))
+        self.ids = [
+            post_id for post_id in ids if post_id not in self.hidden_ids
+        ]
+
+    @cached_property
+    def hot_count(self):
+        if self.truncated:
+            return scope_count(self.scope, self.pk) - len(self.hidden_ids)
+        return len(self.ids)
+
+    @cached_property
+    def archived_posts(self):
+        return scope_queryset(self.scope, self.pk, ArchivedPost)
+
+    @cached_property
+    def archived_count(self):
+        return scope_count(self.scope, self.pk, ArchivedPost) - count_authors(
+            self.archived_posts, self.hidden
+        )
+
+    @cached_property
+    def count(self):
+        return self.hot_count + self.archived_count
+
+    def page_posts(self, bottom, top):
+        if top > len(self.ids) and self.count > len(self.ids):
+            return PartitionedPosts(
+                exclude_authors(self.object_list, self.hidden),
+                exclude_authors(self.archived_posts, self.hidden),
+                self.hot_count, self.archived_count
+            )[bottom:top]
+        return self.hydrate(self.ids[bottom:top])
+
+    def hydrate(self, ids):
+        field = SCOPES[self.scope]
+        posts = [
+            post for post in post_cache.get_many(ids)
+            if getattr(post, field) == self.pk
+        ]
+        if len(posts) != len(ids):
+            # посты удалены или перенесены в обход сигналов
+            drop_timeline(self.scope, self.pk)
+        return posts
+
+
+def timeline_page(request, scope, pk, per_page):
+    paginator = TimelinePaginator(scope, pk, per_page)
+    return paginator.get_page(request.GET.get('page'))
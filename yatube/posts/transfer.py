@@ -0,0 +1,490 @@
+"""Выгрузка и загрузка постов в формате NDJSON.
+
+Каждая строка - один JSON-объект с полем ``type``: group, user, post,
+comment или follow. Пользователи и группы выгружаются перед первой
+записью, которая на них ссылается, и ищутся при загрузке по username и
+slug. Посты и комментарии сохраняют свои id, как в loaddata, если id в
+базе свободен. Запись, чей id занят такой же записью (тот же автор,
+дата и текст), считается уже загруженной и пропускается, поэтому
+прерванную загрузку можно продолжить с последней сохранённой строки.
+Если id занят другой записью, пост получает новый id, и его
+комментарии переносятся на него. Картинки не копируются: в файл
+попадает только имя файла в хранилище.
+
+Архивные посты (posts.archive) выгружаются после рабочих с теми же
+фильтрами, вместе со своими комментариями; у их записей post и comment
+поле ``archived`` равно true, и загружаются они снова в ArchivedPost и
+ArchivedComment. export_posts --no-archive выгружает только рабочие
+таблицы.
+
+Выгрузка идёт пачками по id без загрузки всей таблицы в память,
+загрузка - через bulk_create пачками по settings.BULK_BATCH_SIZE.
+bulk_create не отправляет сигналы, поэтому после каждой пачки
+сбрасываются ленты и счётчики затронутых групп и авторов.
+"""
+import json
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max, Q
+from django.utils.dateparse import parse_datetime
+
+from core.edgecache import purge
+
+from . import counts, timelines
+from .edge import LISTING_TAG, author_tag, group_tag
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Group, Post, User
+)
+
+# порядок сохранения записей одной пачки: сначала те, на кого ссылаются
+RECORD_TYPES = ('group', 'user', 'post', 'comment', 'follow')
+
+
+class TransferError(ValueError):
+    pass
+
+
+def post_content(post):
+    return post.author_id, post.pub_date, post.text
+
+
+def comment_content(comment):
+    return comment.post_id, comment.author_id, comment.created, comment.text
+
+
+def taken_ids(models, ids, fields):
+    """{id: запись} из рабочей и архивной таблиц для занятых ids."""
+    taken = {}
+    for model in models:
+        taken.update(model.objects.filter(pk__in=ids).only(*fields).in_bulk())
+    return taken
+
+
+def next_free_id(objects, models):
+    """id больше всех id objects и таблиц models."""
+    ids = [obj.pk for obj in objects]
+    for model in models:
+        ids.append(model.objects.aggregate(Max('id'))['id__max'] or 0)
+    return max(ids) + 1
+
+
+def bulk_create_each(objects, models):
+    """bulk_create объектов objects отдельно для каждой модели."""
+    created = []
+    for model in models:
+        created += model.objects.bulk_create(
+            [obj for obj in objects if type(obj) is model]
+        )
+    return created
+
+
+def dumps(record):
+    return json.dumps(record, ensure_ascii=False)
+
+
+def filter_posts(group=None, author=None, since=None, until=None,
+                 model=Post):
+    posts = model.objects.all()
+    if group:
+        posts = posts.filter(group__slug=group)
+    if author:
+        posts = posts.filter(author__username=author)
+    if since:
+        posts = posts.filter(pub_date__gte=since)
+    if until:
+        posts = posts.filter(pub_date__lt=until)
+    return posts
+
+
+def chunks(queryset, size):
+    """Пачки queryset по возрастанию pk без OFFSET."""
+    last = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last).order_by('pk')[:size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1].pk
+
+
+class Exporter:
+    def __init__(self):
+        self.users = set()
+        self.groups = set()
+
+    def user(self, user):
+        if user.pk in self.users:
+            return
+        self.users.add(user.pk)
+        yield {'type': 'user', 'username': user.username,
+               'first_name': user.first_name, 'last_name': user.last_name}
+
+    def group(self, group):
+        if group is None or group.pk in self.groups:
+            return
+        self.groups.add(group.pk)
+        yield {'type': 'group', 'slug': group.slug, 'title': group.title,
+               'description': group.description}
+
+    def records(self, posts, comments=True, follows=True, archived=None):
+        """Записи постов posts, затем архивных постов archived."""
+        parts = [posts] if archived is None else [posts, archived]
+        for part in parts:
+            yield from self.posts(part, comments)
+        if follows:
+            yield from self.follows(parts)
+
+    def posts(self, posts, comments):
+        size = settings.BULK_BATCH_SIZE
+        is_archived = posts.model is ArchivedPost
+        for chunk in chunks(posts.select_related('author', 'group'), size):
+            for post in chunk:
+                yield from self.user(post.author)
+                yield from self.group(post.group)
+                yield {
+                    'type': 'post', 'id': post.pk, 'text': post.text,
+                    'pub_date': post.pub_date.isoformat(),
+                    'author': post.author.username,
+                    'group': post.group.slug if post.group else None,
+                    'image': post.image.name or '',
+                    'image_color': post.image_color,
+                    'hot_score': post.hot_score,
+                    'archived': is_archived,
+                }
+            if comments:
+                yield from self.comments(
+                    [post.pk for post in chunk], is_archived
+                )
+
+    def comments(self, post_ids, is_archived):
+        model = ArchivedComment if is_archived else Comment
+        for comment in model.objects.filter(
+            post_id__in=post_ids
+        ).select_related('author').order_by('pk').iterator():
+            yield from self.user(comment.author)
+            yield {'type': 'comment', 'id': comment.pk,
+                   'post': comment.post_id,
+                   'author': comment.author.username,
+                   'text': comment.text,
+                   'created': comment.created.isoformat(),
+                   'archived': is_archived}
+
+    def follows(self, parts):
+        """Подписки на авторов выгруженных постов."""
+        authors = Q()
+        for posts in parts:
+            authors |= Q(author_id__in=posts.values('author_id'))
+        follows = Follow.objects.filter(authors)
+        for chunk in chunks(follows.select_related('user', 'author'),
+                            settings.BULK_BATCH_SIZE):
+            for follow in chunk:
+                yield from self.user(follow.user)
+                yield {'type': 'follow', 'user': follow.user.username,
+                       'author': follow.author.username}
+
+
+def export_records(posts, comments=True, follows=True, archived=None):
+    """Генератор записей для постов queryset posts и архива archived."""
+    return Exporter().records(posts, comments, follows, archived)
+
+
+@contextmanager
+def keep_dates():
+    """Не даёт auto_now_add затереть даты из файла при bulk_create."""
+    fields = [Post._meta.get_field('pub_date'),
+              Comment._meta.get_field('created')]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Importer:
+    def __init__(self):
+        self.users = {}
+        self.groups = {}
+        # id поста в файле -> id в базе для постов, чей id был занят
+        self.post_ids = {}
+        self.stats = dict.fromkeys(RECORD_TYPES, 0)
+
+    def save(self, batch):
+        """Сохраняет пачку записей, сгруппированных по типу."""
+        with transaction.atomic(), keep_dates():
+            saved = {
+                'group': self.save_groups(batch['group']),
+                'user': self.save_users(batch['user']),
+                'post': self.save_posts(batch['post']),
+                'comment': self.save_comments(batch['comment']),
+                'follow': self.save_follows(batch['follow']),
+            }
+        for kind in RECORD_TYPES:
+            self.stats[kind] += len(saved[kind])
+        self.invalidate(saved['post'])
+
+    def save_groups(self, records):
+        slugs = [record['slug'] for record in records]
+        existing = set(Group.objects.filter(
+            slug__in=slugs
+        ).values_list('slug', flat=True))
+        groups = Group.objects.bulk_create(
+            Group(slug=record['slug'], title=record['title'],
+                  description=record['description'])
+            for record in records if record['slug'] not in existing
+        )
+        self.groups.update(Group.objects.filter(
+            slug__in=slugs
+        ).values_list('slug', 'pk'))
+        return groups
+
+    def save_users(self, records):
+        names = [record['username'] for record in records]
+        existing = set(User.objects.filter(
+            username__in=names
+        ).values_list('username', flat=True))
+        users = User.objects.bulk_create(
+            User(username=record['username'],
+                 first_name=record['first_name'],
+                 last_name=record['last_name'],
+                 password=make_password(None))
+            for record in records if record['username'] not in existing
+        )
+        self.users.update(User.objects.filter(
+            username__in=names
+        ).values_list('username', 'pk'))
+        return users
+
+    def user_id(self, username):
+        if username not in self.users:
+            # пользователь уже есть в базе и выгружен в прошлой пачке
+            pk = User.objects.filter(
+                username=username
+            ).values_list('pk', flat=True).first()
+            if pk is None:
+                raise TransferError(f'Неизвестный пользователь {username}')
+            self.users[username] = pk
+        return self.users[username]
+
+    def group_id(self, slug):
+        if slug is None:
+            return None
+        if slug not in self.groups:
+            pk = Group.objects.filter(
+                slug=slug
+            ).values_list('pk', flat=True).first()
+            if pk is None:
+                raise TransferError(f'Неизвестная группа {slug}')
+            self.groups[slug] = pk
+        return self.groups[slug]
+
+    def match_posts(self, posts):
+        """Отделяет посты, которые уже есть в базе.
+
+        Возвращает (новые посты со свободным id, посты с занятым id).
+        Для уже загруженных постов с другим id запоминается соответствие
+        в self.post_ids.
+        """
+        fields = ('id', 'author_id', 'pub_date', 'text')
+        taken = taken_ids(
+            (Post, ArchivedPost), [post.pk for post in posts], fields
+        )
+        fresh = [post for post in posts if post.pk not in taken]
+        clashing = [
+            post for post in posts if post.pk in taken
+            and post_content(taken[post.pk]) != post_content(post)
+        ]
+        if not clashing:
+            return fresh, []
+        # пост мог быть загружен раньше под новым id
+        loaded = {}
+        for model in (Post, ArchivedPost):
+            loaded.update(
+                (post_content(post), post.pk)
+                for post in model.objects.filter(
+                    author_id__in={post.author_id for post in clashing},
+                    pub_date__in={post.pub_date for post in clashing},
+                ).only(*fields)
+            )
+        unmatched = []
+        for post in clashing:
+            pk = loaded.get(post_content(post))
+            if pk is None:
+                unmatched.append(post)
+            else:
+                self.post_ids[post.pk] = pk
+        return fresh, unmatched
+
+    def build_posts(self, records):
+        return [
+            (ArchivedPost if record.get('archived') else Post)(
+                id=record['id'], text=record['text'],
+                pub_date=parse_datetime(record['pub_date']),
+                author_id=self.user_id(record['author']),
+                group_id=self.group_id(record['group']),
+                image=record['image'],
+                image_color=record.get('image_color', ''),
+                hot_score=record['hot_score']
+            )
+            for record in records
+        ]
+
+    def save_posts(self, records):
+        posts = self.build_posts(records)
+        fresh, unmatched = self.match_posts(posts)
+        next_id = next_free_id(posts, (Post, ArchivedPost))
+        for post in unmatched:
+            self.post_ids[post.pk] = post.id = next_id
+            next_id += 1
+        return bulk_create_each(fresh + unmatched, (Post, ArchivedPost))
+
+    def resolve_posts(self, records):
+        """Восстанавливает self.post_ids для уже загруженных строк."""
+        self.match_posts(self.build_posts(records))
+
+    def save_comments(self, records):
+        comments = [
+            (ArchivedComment if record.get('archived') else Comment)(
+                id=record['id'],
+                post_id=self.post_ids.get(record['post'], record['post']),
+                author_id=self.user_id(record['author']),
+                text=record['text'],
+                created=parse_datetime(record['created'])
+            )
+            for record in records
+        ]
+        taken = taken_ids(
+            (Comment, ArchivedComment), [comment.pk for comment in comments],
+            ('id', 'post_id', 'author_id', 'created', 'text')
+        )
+        clashing = [
+            comment for comment in comments if comment.pk in taken
+            and comment_content(taken[comment.pk]) != comment_content(comment)
+        ]
+        fresh = [comment for comment in comments if comment.pk not in taken]
+        loaded = set()
+        if clashing:
+            loaded = {
+                comment_content(comment)
+                for model in (Comment, ArchivedComment)
+                for comment in model.objects.filter(
+                    post_id__in={comment.post_id for comment in clashing}
+                ).only('id', 'post_id', 'author_id', 'created', 'text')
+            }
+            next_id = next_free_id(comments, (Comment, ArchivedComment))
+        for comment in clashing:
+            # на комментарии никто не ссылается: id выдаст база, а у
+            # ArchivedComment id не автоинкрементный и выдаётся здесь
+            comment.id = None
+            if isinstance(comment, ArchivedComment):
+                comment.id = next_id
+                next_id += 1
+        return bulk_create_each(fresh + [
+            comment for comment in clashing
+            if comment_content(comment) not in loaded
+        ], (Comment, ArchivedComment))
+
+    def save_follows(self, records):
+        pairs = {
+            (self.user_id(record['user']), self.user_id(record['author']))
+            for record in records
+        }
+        existing = set(Follow.objects.filter(
+            user_id__in={user_id for user_id, _ in pairs},
+            author_id__in={author_id for _, author_id in pairs},
+        ).values_list('user_id', 'author_id'))
+        return Follow.objects.bulk_create(
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in pairs - existing
+        )
+
+    def invalidate(self, posts):
+        authors = {post.author_id for post in posts}
+        groups = {post.group_id for post in posts if post.group_id}
+        for author_id in authors:
+            timelines.drop_timeline('author', author_id)
+        for group_id in groups:
+            timelines.drop_timeline('group', group_id)
+        for model in (Post, ArchivedPost):
+            counts.drop_counts('author', *authors, model=model)
+            counts.drop_counts('group', *groups, model=model)
+        if posts:
+            slugs = {slug for slug, pk in self.groups.items() if pk in groups}
+            purge(LISTING_TAG, *map(author_tag, authors),
+                  *map(group_tag, slugs))
+
+    def finish(self):
+        """Сдвигает последовательности id после вставки с явными id."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Post, Comment]
+        )
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+
+def parse(number, line):
+    try:
+        record = json.loads(line)
+        if record['type'] not in RECORD_TYPES:
+            raise KeyError(record['type'])
+    except (KeyError, TypeError, ValueError):
+        raise TransferError(f'Строка {number}: неверная запись')
+    return record
+
+
+def read_records(lines, start, importer):
+    """(номер строки, запись) для строк после start.
+
+    Посты строк до start уже загружены и только сопоставляются с базой:
+    их комментарии могут идти после start.
+    """
+    skipped = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        record = parse(number, line)
+        if number > start:
+            if skipped:
+                importer.resolve_posts(skipped)
+                skipped = []
+            yield number, record
+        elif record['type'] == 'post':
+            skipped.append(record)
+            if len(skipped) >= settings.BULK_BATCH_SIZE:
+                importer.resolve_posts(skipped)
+                skipped = []
+
+
+def import_lines(lines, start=0, checkpoint=None):
+    """Загружает строки NDJSON, пропустив первые start строк.
+
+    После каждой сохранённой пачки вызывается checkpoint(номер строки),
+    с которого можно продолжить. Возвращает число сохранённых записей
+    по типам.
+    """
+    importer = Importer()
+    batch = {kind: [] for kind in RECORD_TYPES}
+    size = 0
+    number = 0
+    for number, record in read_records(lines, start, importer):
+        batch[record['type']].append(record)
+        size += 1
+        if size >= settings.BULK_BATCH_SIZE:
+            importer.save(batch)
+            if checkpoint:
+                checkpoint(number)
+            batch = {kind: [] for kind in RECORD_TYPES}
+            size = 0
+    if size:
+        importer.save(batch)
+        if checkpoint:
+            checkpoint(number)
+    importer.finish()
+    return importer.stats
@@ -6,7 +6,9 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('hot/', views.hot_index, name='hot_index'),
     path('group/<slug:slug>/', views.group_posts, name='posts'),
+    path('group/<slug:slug>/hot/', views.group_hot, name='group_hot'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
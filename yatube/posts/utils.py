@@ -1,7 +1,253 @@
+from django.conf import settings
 from django.core.paginator import Paginator
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template import RequestContext
+from django.template.loader import get_template, render_to_string
+from django.utils.functional import SimpleLazyObject
+from django.utils.safestring import mark_safe
 
+from core.edgecache import add_surrogate_keys
+from core.minify import minify_html
+from users.models import UserDeletion
 
-def create_paginator(request, posts, POSTS_LIMIT):
-    paginator = Paginator(posts, POSTS_LIMIT)
+from .edge import page_tags, post_tag
+from .post_cache import post_cache
+from .thumbnails import resolve_thumbnails
+
+# место списка постов в шаблоне при потоковой отрисовке
+POST_LIST_SLOT = '<!-- post-list -->'
+
+
+class CountedPaginator(Paginator):
+    """Paginator, которому число объектов можно передать готовым.
+
+    Страница получает elided_page_range: первая и последняя страницы,
+    соседи текущей и многоточия вместо остальных, чтобы шаблон не
+    перебирал page_range целиком.
+    """
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+    def page(self, number):
+        """Страница, посты которой читаются при первом обращении к ним.
+
+        Если список постов страницы уже есть в кэше фрагментов
+        (core.pagecache), сами посты не читаются вовсе.
+        """
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        return self._get_page(
+            SimpleLazyObject(lambda: self.page_posts(bottom, top)),
+            number, self
+        )
+
+    def page_posts(self, bottom, top):
+        posts = self.object_list[bottom:top]
+        if isinstance(posts, QuerySet):
+            # из базы читаются только id, сами посты - из кэша карточек
+            posts = post_cache.get_many(posts.values_list('id', flat=True))
+        return posts
+
+    def _get_page(self, *args, **kwargs):
+        # страница остаётся обычным Page, диапазон - её атрибут
+        page = super()._get_page(*args, **kwargs)
+        page.elided_page_range = list(
+            self.get_elided_page_range(page.number)
+        )
+        return page
+
+
+class PartitionedPosts:
+    """Посты рабочей таблицы, за которыми идут архивные.
+
+    Архив содержит только посты старше любого поста рабочей таблицы,
+    поэтому список по убыванию даты - это просто одна часть за другой.
+    Срез, который целиком попадает в рабочую таблицу, архив не читает.
+    """
+
+    def __init__(self, posts, archived, count, archived_count):
+        self.posts = posts
+        self.archived = archived
+        self.hot_count = count
+        self.archived_count = archived_count
+
+    def count(self):
+        return self.hot_count + self.archived_count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        start, stop = index.start or 0, index.stop
+        posts = []
+        if start < self.hot_count:
+            posts = post_cache.get_many(self.posts.values_list(
+                'id', flat=True
+            )[start:min(stop, self.hot_count)])
+        if stop > self.hot_count:
+            archived = list(self.archived.select_related('author', 'group')[
+                max(start - self.hot_count, 0):stop - self.hot_count
+            ])
+            thumbnails = resolve_thumbnails(post.image for post in archived)
+            for post in archived:
+                post.thumb_url = thumbnails.get(post.image.name, '')
+            posts += archived
+        return posts
+
+    def without_authors(self, authors):
+        """Те же списки без постов authors, с уменьшенными числами."""
+        return PartitionedPosts(
+            exclude_authors(self.posts, authors),
+            exclude_authors(self.archived, authors),
+            self.hot_count - count_authors(self.posts, authors),
+            self.archived_count - count_authors(self.archived, authors)
+        )
+
+
+def exclude_authors(posts, authors):
+    return posts.exclude(author_id__in=authors) if authors else posts
+
+
+def count_authors(posts, authors):
+    """Число постов authors в queryset posts."""
+    if not authors:
+        return 0
+    return posts.filter(author_id__in=authors).count()
+
+
+def hide_deleted_authors(posts, count=None):
+    """Убирает посты мягко удалённых пользователей до их очистки.
+
+    Посты исключаются до нарезки на страницы, а count уменьшается на
+    их число, поэтому страницы не получаются короче и номера страниц
+    не уходят за конец списка. Возвращает (posts, count).
+    """
+    hidden = UserDeletion.objects.hidden_ids()
+    if not hidden:
+        return posts, count
+    if isinstance(posts, PartitionedPosts):
+        return posts.without_authors(hidden), count
+    if count is not None:
+        count -= count_authors(posts, hidden)
+    return exclude_authors(posts, hidden), count
+
+
+def create_paginator(request, posts, POSTS_LIMIT, count=None, limit=None):
+    """Страница posts; limit ограничивает число постов в списке."""
+    posts, count = hide_deleted_authors(posts, count)
+    if limit is not None:
+        count = min(count, limit)
+    paginator = CountedPaginator(posts, POSTS_LIMIT, count)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def render_listing(request, template_name, context):
+    """Отрисовывает страницу со списком постов из context['page_obj'].
+
+    Ответ помечается Surrogate-Key всех постов страницы.
+    """
+    fragment_cache = getattr(request, 'fragment_cache', None)
+    if fragment_cache is not None:
+        return render_with_fragment(
+            request, template_name, context, fragment_cache
+        )
+    response = render_page(request, template_name, context)
+    return add_surrogate_keys(response, *page_tags(context['page_obj']))
+
+
+def render_with_fragment(request, template_name, context, fragment_cache):
+    """Страница пользователя со списком постов из кэша фрагментов.
+
+    Вместе с разметкой в кэше лежат id постов страницы для
+    Surrogate-Key, поэтому при попадании посты страницы не читаются:
+    CountedPaginator отдаёт их лениво. Счётчики для навигации по
+    страницам берутся из кэша posts.counts. Разметка минифицируется
+    один раз, перед записью в кэш.
+    """
+    cached = fragment_cache.get()
+    if cached is None:
+        posts = list(context['page_obj'].object_list)
+        fragment = ''.join(render_posts(request, posts))
+        if settings.HTML_MINIFY:
+            fragment = minify_html(fragment)
+        cached = (fragment, [post.pk for post in posts])
+        fragment_cache.set(cached)
+    fragment, post_ids = cached
+    response = render(request, template_name,
+                      dict(context, post_list_html=mark_safe(fragment)))
+    return add_surrogate_keys(response, *map(post_tag, post_ids))
+
+
+def render_page(request, template_name, context):
+    """Ответ для render_listing: обычный или потоком.
+
+    При settings.STREAMING_RENDER страница отдаётся потоком: всё, что
+    выше списка (head, шапка, заголовки), уходит клиенту сразу, а
+    карточки постов страницы, уже полученные из кэша карточек,
+    отрисовываются и отправляются по одной. Страница, которую
+    core.pagecache.public_cache кэширует целиком, рисуется без потока:
+    потоковый ответ в кэш не записать.
+    """
+    if not settings.STREAMING_RENDER or getattr(
+        request, 'cache_whole_page', False
+    ):
+        return render(request, template_name, context)
+    # страница целиком, кроме карточек, рисуется до ответа: так CSRF- и
+    # session-middleware видят обращения шаблона к токену и сессии
+    html = render_to_string(
+        template_name,
+        dict(context, post_list_html=mark_safe(POST_LIST_SLOT)),
+        request
+    )
+    head, tail = html.split(POST_LIST_SLOT, 1)
+    return StreamingHttpResponse(stream_listing(
+        request, head, context['page_obj'].object_list, tail
+    ))
+
+
+def render_posts(request, posts):
+    """Карточки постов posts/includes/post.html, разделённые <hr>."""
+    template = get_template('posts/includes/post.html').template
+    context = RequestContext(request)
+    # контекст-процессоры выполняются один раз на всю страницу
+    with context.render_context.push_state(template), \
+            context.bind_template(template):
+        for number, post in enumerate(posts):
+            if number:
+                yield '<hr>'
+            with context.push(post=post):
+                yield template._render(context)
+
+
+def stream_listing(request, head, posts, tail):
+    yield head
+    yield from render_posts(request, posts)
+    yield tail
@@ -1,33 +1,86 @@
 from django.contrib.auth.decorators import login_required
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.decorators.cache import cache_page
 from django.urls import reverse
-from yatube.settings import POSTS_LIMIT
-
-from .models import Follow, Post, Group, User
+from yatube.settings import HOT_POSTS_LIMIT, POSTS_LIMIT
+
+from core.edgecache import add_surrogate_keys, cache_policy
+from core.minify import minified
+from core.pagecache import public_cache
+from core.throttling import throttle
+from users.models import UserDeletion
+
+from .counts import follow_count, scope_count, total_count
+from .edge import LISTING_TAG, author_tag, group_tag, post_tag
+from .models import ArchivedPost, Follow, Post, Group, User
+from .ranking import hot_posts
 from .forms import PostForm, CommentForm
-from .utils import create_paginator
+from .thumbnails import thumbnail_url
+from .timelines import timeline_page
+from .utils import (
+    PartitionedPosts, create_paginator, exclude_authors, render_listing
+)
 
 
-@cache_page(20, key_prefix="index_page")
+@cache_policy(s_maxage=20, stale_while_revalidate=60)
+@public_cache(20, key_prefix='index_page')
+@minified
 def index(request):
-    posts = Post.objects.all()
+    posts = PartitionedPosts(
+        Post.objects.all(), ArchivedPost.objects.all(),
+        total_count(), total_count(ArchivedPost)
+    )
     page_obj = create_paginator(request, posts, POSTS_LIMIT)
-    return render(request, 'posts/index.html', {'page_obj': page_obj})
+    return add_surrogate_keys(
+        render_listing(request, 'posts/index.html', {'page_obj': page_obj}),
+        LISTING_TAG
+    )
+
+
+@cache_policy(s_maxage=20, stale_while_revalidate=60)
+@public_cache(20, key_prefix='hot_page')
+@minified
+def hot_index(request):
+    page_obj = create_paginator(
+        request, hot_posts(), POSTS_LIMIT, total_count(), HOT_POSTS_LIMIT
+    )
+    return add_surrogate_keys(
+        render_listing(request, 'posts/hot.html', {'page_obj': page_obj}),
+        LISTING_TAG
+    )
+
+
+@cache_policy(s_maxage=60, stale_while_revalidate=300)
+def group_hot(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    page_obj = create_paginator(
+        request, hot_posts(group), POSTS_LIMIT,
+        scope_count('group', group.pk), HOT_POSTS_LIMIT
+    )
+    return add_surrogate_keys(
+        render_listing(request, 'posts/group_list.html', {
+            'page_obj': page_obj, 'group': group, 'hot': True}),
+        group_tag(group.slug)
+    )
 
 
+@cache_policy(s_maxage=60, stale_while_revalidate=300)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = create_paginator(request, posts, POSTS_LIMIT)
-    return render(request, 'posts/group_list.html', {
-        'page_obj': page_obj, 'group': group})
+    page_obj = timeline_page(request, 'group', group.pk, POSTS_LIMIT)
+    return add_surrogate_keys(
+        render_listing(request, 'posts/group_list.html', {
+            'page_obj': page_obj, 'group': group}),
+        group_tag(group.slug)
+    )
 
 
+@cache_policy(s_maxage=60, stale_while_revalidate=300)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    page_obj = create_paginator(request, posts, POSTS_LIMIT)
+    if author.pk in UserDeletion.objects.hidden_ids():
+        raise Http404
+    page_obj = timeline_page(request, 'author', author.pk, POSTS_LIMIT)
     if request.user.is_authenticated:
         following = Follow.objects.filter(
             user=request.user, author=author
@@ -35,24 +88,46 @@ def profile(request, username):
 
     else:
         following = False
-    return render(request, 'posts/profile.html',
-                  {'author': author,
-                   'page_obj': page_obj,
-                   'following': following})
+    return add_surrogate_keys(
+        render_listing(request, 'posts/profile.html',
+                       {'author': author,
+                        'page_obj': page_obj,
+                        'following': following}),
+        author_tag(author.pk)
+    )
 
 
+@cache_policy(s_maxage=60, stale_while_revalidate=300)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = Post.objects.filter(id=post_id).first()
+    archived = post is None
+    if archived:
+        post = get_object_or_404(ArchivedPost, id=post_id)
+    hidden = UserDeletion.objects.hidden_ids()
+    if post.author_id in hidden:
+        raise Http404
+    post.thumb_url = thumbnail_url(post.image)
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
-
-    return render(request, 'posts/post_detail.html',
-                  {'post': post,
-                   'form': form,
-                   'comments': comments})
+    comments = exclude_authors(post.comments.all(), hidden)
+    tags = [post_tag(post.pk), author_tag(post.author_id)]
+    if post.group:
+        tags.append(group_tag(post.group.slug))
+    return add_surrogate_keys(
+        render(request, 'posts/post_detail.html',
+               {'post': post,
+                'author_posts_count': (
+                    scope_count('author', post.author_id)
+                    + scope_count('author', post.author_id, ArchivedPost)
+                ),
+                'archived': archived,
+                'form': form,
+                'comments': comments}),
+        *tags
+    )
 
 
 @login_required
+@throttle('post', '10/m')
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -91,6 +166,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@throttle('comment', '10/m')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -104,12 +180,18 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = PartitionedPosts(
+        Post.objects.filter(author__following__user=request.user),
+        ArchivedPost.objects.filter(author__following__user=request.user),
+        follow_count(request.user),
+        follow_count(request.user, ArchivedPost)
+    )
     page_obj = create_paginator(request, post_list, POSTS_LIMIT)
-    return render(request, 'posts/follow.html', {'page_obj': page_obj})
+    return render_listing(request, 'posts/follow.html', {'page_obj': page_obj})
 
 
 @login_required
+@throttle('follow', '30/m', methods=None)
 def profile_follow(request, username):
     user = request.user
     author = User.objects.get(username=username)
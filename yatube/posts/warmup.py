@@ -0,0 +1,116 @@
+"""Прогрев кэша главной, популярных групп и профилей.
+
+Страницы запрашиваются через обычный стек middleware, поэтому в кэш
+попадает всё, что заполнил бы первый посетитель: кэш страниц гостей,
+ленты, счётчики и карточки постов. Группы и профили выбираются по
+статистике core.access, а если её мало - по числу постов.
+
+Запросы строятся RequestFactory и проходят через BaseHandler, как в
+WSGIHandler. django.test.Client для этого не годится: на время запроса
+он отключает close_old_connections от глобальных сигналов
+request_started и request_finished, а прогрев идёт рядом с настоящими
+запросами в других потоках.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import connections
+from django.core.handlers.base import BaseHandler
+from django.db.models import Count
+from django.test import RequestFactory
+from django.urls import reverse
+
+from core.access import access_counter
+
+from .models import Group, User
+
+logger = logging.getLogger(__name__)
+
+
+def most_visited(view_name, model, field, limit):
+    values = access_counter.top(view_name, limit)
+    if len(values) < limit:
+        values += model.objects.annotate(
+            posts_count=Count('posts')
+        ).filter(posts_count__gt=0).exclude(
+            **{f'{field}__in': values}
+        ).order_by('-posts_count').values_list(field, flat=True)[
+            :limit - len(values)
+        ]
+    return values
+
+
+def warm_targets(groups=None, profiles=None):
+    access_counter.flush()
+    if groups is None:
+        groups = settings.CACHE_WARM_GROUPS
+    if profiles is None:
+        profiles = settings.CACHE_WARM_PROFILES
+    return [reverse('posts:index'), reverse('posts:hot_index')] + [
+        reverse('posts:posts', args=[slug])
+        for slug in most_visited('posts:posts', Group, 'slug', groups)
+    ] + [
+        reverse('posts:profile', args=[username])
+        for username in most_visited(
+            'posts:profile', User, 'username', profiles
+        )
+    ]
+
+
+def warmup_handler():
+    handler = BaseHandler()
+    handler.load_middleware()
+    return handler
+
+
+def fetch(handler, url):
+    request = RequestFactory(
+        HTTP_HOST=settings.CACHE_WARM_HOST, HTTP_X_CACHE_WARMER='1'
+    ).get(url)
+    try:
+        response = handler.get_response(request)
+        if response.streaming:
+            # потоком отдаются страницы без кэша страниц гостей (группы,
+            # профили): посты читаются в кэш карточек по мере чтения ответа
+            for _ in response.streaming_content:
+                pass
+        response.close()
+        return response.status_code
+    finally:
+        # у каждого потока пула своё соединение с базой
+        connections.close_all()
+
+
+def warm(urls, concurrency=None):
+    """Запрашивает urls не больше чем в concurrency потоков."""
+    handler = warmup_handler()
+    with ThreadPoolExecutor(
+        max_workers=concurrency or settings.CACHE_WARM_CONCURRENCY,
+        thread_name_prefix='cache-warmer',
+    ) as executor:
+        return dict(zip(urls, executor.map(partial(fetch, handler), urls)))
+
+
+def warm_forever(interval):
+    while True:
+        try:
+            warm(warm_targets())
+        except Exception:
+            logger.exception('Не удалось прогреть кэш')
+        time.sleep(interval)
+
+
+def start_background_warmer():
+    """Запускает прогрев в фоне, если задан CACHE_WARM_INTERVAL."""
+    if not settings.CACHE_WARM_INTERVAL:
+        return None
+    thread = threading.Thread(
+        target=warm_forever, args=(settings.CACHE_WARM_INTERVAL,),
+        name='cache-warmer', daemon=True,
+    )
+    thread.start()
+    return thread
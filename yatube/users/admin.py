@@ -1 +1,31 @@
-# from django.contrib import admin
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.urls import reverse
+
+from .deletion import soft_delete_in_background
+
+User = get_user_model()
+
+
+class BatchDeleteUserAdmin(UserAdmin):
+    actions = ('soft_delete_users',)
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # каскад загружает в память все посты и комментарии пользователя
+        actions.pop('delete_selected', None)
+        return actions
+
+    def soft_delete_users(self, request, queryset):
+        for user in queryset:
+            job_id = soft_delete_in_background(user)
+            url = reverse('admin:posts_post_job', args=[job_id])
+            self.message_user(
+                request, f'{user.username} скрыт, данные удаляются: {url}'
+            )
+    soft_delete_users.short_description = 'Скрыть и удалить в фоне'
+
+
+admin.site.unregister(User)
+admin.site.register(User, BatchDeleteUserAdmin)
@@ -0,0 +1,36 @@
+"""Бэкенд аутентификации с кэшем пользователей.
+
+AuthenticationMiddleware на каждом запросе достаёт пользователя сессии
+через get_user бэкенда, и ModelBackend делает для этого SELECT по
+auth_user. CachedModelBackend держит пользователя в кэше
+settings.USER_CACHE_TIMEOUT секунд. Запись сбрасывается сигналами
+users.signals при сохранении и удалении пользователя; код, который
+меняет пользователей через QuerySet.update(), вызывает forget_user сам.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+User = get_user_model()
+
+
+def user_key(user_id):
+    return f'user:{user_id}'
+
+
+def forget_user(*user_ids):
+    cache.delete_many([user_key(pk) for pk in user_ids])
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = User._default_manager.get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,89 @@
+"""Удаление пользователя с большой историей постов и комментариев.
+
+Каскад User.delete() загружает в память все связанные объекты и
+удаляет их одной долгой транзакцией. Здесь зависимые строки удаляются
+снизу вверх пачками по settings.BULK_BATCH_SIZE, каждая пачка - своим
+коротким DELETE без загрузки моделей: комментарии и подписки
+пользователя, комментарии к его архивным постам, сами архивные посты,
+его посты (posts.bulk.delete_posts вместе с комментариями к ним) и в
+конце сама запись пользователя.
+
+Мягкое удаление сразу блокирует вход и скрывает посты со страниц, а
+очистку оставляет фоновой задаче или команде delete_user --pending.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from core.edgecache import purge
+from core.jobs import start_job
+from posts import bulk
+from posts.edge import LISTING_TAG, author_tag
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Post
+)
+
+from .backends import forget_user
+from .models import UserDeletion
+
+User = get_user_model()
+
+
+def soft_delete(user):
+    """Скрывает пользователя и его посты, не удаляя данных."""
+    User.objects.filter(pk=user.pk).update(is_active=False)
+    forget_user(user.pk)
+    UserDeletion.objects.get_or_create(user_id=user.pk)
+    UserDeletion.objects.forget_hidden()
+    purge(LISTING_TAG, author_tag(user.pk))
+
+
+def delete_in_batches(queryset, progress, done):
+    """Удаляет строки queryset пачками, не загружая их.
+
+    Сигналы не отправляются, а каскад не проверяется: на строки
+    queryset уже никто не ссылается.
+    """
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[
+            :settings.BULK_BATCH_SIZE
+        ])
+        if not ids:
+            return done
+        batch = queryset.model._base_manager.filter(pk__in=ids)
+        batch._raw_delete(batch.db)
+        done += len(ids)
+        progress(done)
+
+
+def delete_user(user_id, progress):
+    """Удаляет пользователя и всё, что на него ссылается, пачками."""
+    querysets = [
+        Comment.objects.filter(author_id=user_id),
+        Follow.objects.filter(user_id=user_id),
+        Follow.objects.filter(author_id=user_id),
+        ArchivedComment.objects.filter(author_id=user_id),
+        # комментарии других пользователей к архивным постам: иначе
+        # каскад ArchivedPost удалил бы их одним DELETE без пачек
+        ArchivedComment.objects.filter(post__author_id=user_id).exclude(
+            author_id=user_id
+        ),
+        ArchivedPost.objects.filter(author_id=user_id),
+    ]
+    posts = Post.objects.filter(author_id=user_id)
+    progress(0, sum(queryset.count() for queryset in querysets)
+             + posts.count())
+    done = 0
+    for queryset in querysets:
+        done = delete_in_batches(queryset, progress, done)
+    bulk.delete_posts(
+        posts, lambda posts_done, total=None: progress(done + posts_done)
+    )
+    User.objects.filter(pk=user_id).delete()
+    UserDeletion.objects.filter(user_id=user_id).delete()
+    UserDeletion.objects.forget_hidden()
+
+
+def soft_delete_in_background(user):
+    soft_delete(user)
+    return start_job(f'Удаление пользователя {user.username}',
+                     delete_user, user.pk)
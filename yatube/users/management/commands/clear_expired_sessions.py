@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from users.sessions import clear_expired_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет истёкшие сессии пачками по settings.BULK_BATCH_SIZE, '
+        'не блокируя таблицу сессий одним большим DELETE.'
+    )
+
+    def handle(self, *args, **options):
+        state = {'total': 0}
+
+        def report(done, total=None):
+            if total is not None:
+                state['total'] = total
+            self.stdout.write(f'  {done}/{state["total"]}')
+
+        done = clear_expired_sessions(report)
+        self.stdout.write(f'Удалено истёкших сессий: {done}')
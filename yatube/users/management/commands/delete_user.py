@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from users.deletion import delete_user, soft_delete
+from users.models import UserDeletion
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пользователей и их данные пачками. С --soft только '
+        'скрывает их, а очистку выполняет запуск с --pending.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*')
+        parser.add_argument(
+            '--soft', action='store_true',
+            help='Заблокировать и скрыть посты, не удаляя данных.'
+        )
+        parser.add_argument(
+            '--pending', action='store_true',
+            help='Дочистить всех мягко удалённых пользователей.'
+        )
+
+    def handle(self, *args, **options):
+        users = list(User.objects.filter(username__in=options['usernames']))
+        missing = set(options['usernames']) - {u.username for u in users}
+        if missing:
+            raise CommandError(f'Нет пользователей: {", ".join(missing)}')
+        for user in users:
+            soft_delete(user)
+        if options['soft']:
+            self.stdout.write(f'Скрыто пользователей: {len(users)}')
+            return
+        user_ids = [user.pk for user in users]
+        if options['pending']:
+            user_ids = list(UserDeletion.objects.values_list(
+                'user_id', flat=True
+            ))
+        for user_id in user_ids:
+            delete_user(user_id, self.progress(user_id))
+            self.stdout.write(f'Пользователь {user_id} удалён')
+
+    def progress(self, user_id):
+        state = {'total': 0}
+
+        def report(done, total=None):
+            if total is not None:
+                state['total'] = total
+            self.stdout.write(f'  {user_id}: {done}/{state["total"]}')
+        return report
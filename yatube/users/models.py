@@ -1,3 +1,37 @@
-# from django.db import models
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
 
-# Create your models here.
+HIDDEN_AUTHORS_KEY = 'users:hidden'
+
+
+class UserDeletionManager(models.Manager):
+    def hidden_ids(self):
+        """id пользователей, чьи посты уже скрыты, а данные удаляются."""
+        ids = cache.get(HIDDEN_AUTHORS_KEY)
+        if ids is None:
+            ids = frozenset(self.values_list('user_id', flat=True))
+            cache.set(HIDDEN_AUTHORS_KEY, ids, settings.USER_DELETION_TIMEOUT)
+        return ids
+
+    def forget_hidden(self):
+        cache.delete(HIDDEN_AUTHORS_KEY)
+
+
+class UserDeletion(models.Model):
+    """Пользователь, удалённый мягко: данные удаляются в фоне.
+
+    Хранит id, а не ForeignKey, чтобы пережить удаление пользователя до
+    конца очистки.
+    """
+    user_id = models.IntegerField(unique=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    objects = UserDeletionManager()
+
+    class Meta:
+        verbose_name = 'Удаление пользователя'
+        verbose_name_plural = 'Удаления пользователей'
+
+    def __str__(self):
+        return str(self.user_id)
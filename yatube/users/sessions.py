@@ -0,0 +1,39 @@
+"""Очистка истёкших сессий пачками.
+
+clearsessions из Django удаляет все истёкшие сессии одним DELETE, и на
+большой таблице django_session он надолго блокирует её. Здесь строки
+удаляются пачками по settings.BULK_BATCH_SIZE ключей, каждая - своим
+коротким DELETE. Для движков сессий без таблицы (кэш, подписанные
+cookie, файлы) вызывается их собственный clear_expired().
+"""
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.utils import timezone
+
+
+def session_store():
+    return import_module(settings.SESSION_ENGINE).SessionStore
+
+
+def clear_expired_sessions(progress):
+    """Удаляет истёкшие сессии, сообщая progress(удалено, всего)."""
+    store = session_store()
+    if not issubclass(store, DBStore):
+        store.clear_expired()
+        progress(0, 0)
+        return 0
+    model = store.get_model_class()
+    expired = model.objects.filter(expire_date__lt=timezone.now())
+    progress(0, expired.count())
+    done = 0
+    while True:
+        keys = list(expired.values_list('session_key', flat=True)[
+            :settings.BULK_BATCH_SIZE
+        ])
+        if not keys:
+            return done
+        model.objects.filter(session_key__in=keys).delete()
+        done += len(keys)
+        progress(done)
@@ -0,0 +1,196 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Group, Post
+)
+
+from .deletion import User, delete_user, soft_delete
+from .models import UserDeletion
+
+
+@override_settings(BULK_BATCH_SIZE=2)
+class UserDeletionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='группа', description='описание', slug='group'
+        )
+        cls.other_post = Post.objects.create(
+            text='чужой пост', author=cls.reader, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author = User.objects.create_user(username='author')
+        posts = [
+            Post.objects.create(
+                text=f'пост {i}', author=self.author, group=self.group
+            ) for i in range(5)
+        ]
+        for post in posts[:3]:
+            Comment.objects.create(post=post, author=self.reader, text='да')
+        Comment.objects.create(
+            post=self.other_post, author=self.author, text='да'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.reader)
+
+    def test_soft_delete_hides_content(self):
+        """Мягкое удаление сразу скрывает посты и профиль."""
+        call_command('delete_user', '--soft', 'author', stdout=StringIO())
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+        response = self.guest_client.get(
+            reverse('posts:posts', args=[self.group.slug])
+        )
+        self.assertEqual(
+            list(response.context['page_obj']), [self.other_post]
+        )
+        response = self.guest_client.get(
+            reverse('posts:profile', args=['author'])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_hidden_comments_excluded(self):
+        """Комментарии скрытого пользователя не видны под чужим постом."""
+        soft_delete(self.author)
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.other_post.pk])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['comments'])
+
+    def test_hidden_posts_excluded_before_paging(self):
+        """Скрытые посты не укорачивают страницы и не входят в счёт."""
+        Post.objects.bulk_create(
+            Post(text=f'пост читателя {i}', author=self.reader,
+                 group=self.group)
+            for i in range(12)
+        )
+        Post.objects.bulk_create(
+            Post(text=f'новый пост {i}', author=self.author, group=self.group)
+            for i in range(5)
+        )
+        soft_delete(self.author)
+        for url in (reverse('posts:index'),
+                    reverse('posts:posts', args=[self.group.slug])):
+            with self.subTest(url=url):
+                page = self.guest_client.get(url).context['page_obj']
+                self.assertEqual(page.paginator.count, 13)
+                self.assertEqual(len(page), 10)
+                self.assertFalse(
+                    [post for post in page if post.author_id == self.author.pk]
+                )
+                last = self.guest_client.get(url, {'page': 2})
+                self.assertEqual(len(last.context['page_obj']), 3)
+
+    def test_chunked_delete(self):
+        """Данные пользователя удаляются пачками, чужие остаются."""
+        call_command('delete_user', '--soft', 'author', stdout=StringIO())
+        out = StringIO()
+        call_command('delete_user', '--pending', stdout=out)
+        self.assertIn(f'{self.author.pk}: 8/8', out.getvalue())
+        self.assertFalse(User.objects.filter(username='author').exists())
+        self.assertEqual(list(Post.objects.all()), [self.other_post])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(UserDeletion.objects.exists())
+
+    def test_archived_comments_deleted_in_batches(self):
+        """Комментарии к архивным постам удаляются пачками по id."""
+        archived = ArchivedPost.objects.create(
+            id=1000, text='архивный', author=self.author,
+            pub_date=timezone.now()
+        )
+        for i in range(3):
+            ArchivedComment.objects.create(
+                id=1000 + i, post=archived, author=self.reader, text='да',
+                created=timezone.now()
+            )
+        with CaptureQueriesContext(connection) as queries:
+            delete_user(self.author.pk, lambda done, total=None: None)
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(ArchivedComment.objects.exists())
+        self.assertEqual(list(Post.objects.all()), [self.other_post])
+        deletes = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('DELETE FROM "posts_archivedcomment"')
+        ]
+        self.assertFalse([sql for sql in deletes if '"post_id"' in sql])
+        self.assertEqual(
+            len([sql for sql in deletes if '"id" IN' in sql]), 2
+        )
+
+
+class SessionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', password='secret'
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('about:author')
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [
+            query['sql'] for query in queries.captured_queries
+            if 'auth_user' in query['sql']
+        ]
+
+    def test_user_is_cached(self):
+        """Сессия и пользователь берутся из кэша без запросов к базе."""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertEqual(queries.captured_queries, [])
+
+    def test_user_change_invalidates_cache(self):
+        """Смена пароля и мягкое удаление сбрасывают кэш пользователя."""
+        self.client.get(self.url)
+        self.user.set_password('other')
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+        self.client.force_login(self.user)
+        self.client.get(self.url)
+        soft_delete(self.user)
+        self.assertTrue(self.user_queries())
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    @override_settings(BULK_BATCH_SIZE=2)
+    def test_clear_expired_sessions(self):
+        """Истёкшие сессии удаляются пачками, живые остаются."""
+        expired = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create(
+            Session(session_key=f'expired{i}', session_data='',
+                    expire_date=expired)
+            for i in range(5)
+        )
+        out = StringIO()
+        call_command('clear_expired_sessions', stdout=out)
+        self.assertIn('5/5', out.getvalue())
+        self.assertIn('  4/5', out.getvalue())
+        self.assertEqual(Session.objects.count(), 1)
+        response = self.client.get(self.url)
+        self.assertTrue(response.context['user'].is_authenticated)
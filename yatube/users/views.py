@@ -1,8 +1,12 @@
+from django.utils.decorators import method_decorator
 from django.views.generic import CreateView
 from django.urls import reverse_lazy
+
+from core.throttling import throttle
 from .forms import CreationForm
 
 
+@method_decorator(throttle('signup', '5/h'), name='dispatch')
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
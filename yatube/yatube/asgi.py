@@ -0,0 +1,12 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Django 2.2 has no native ASGI support, so the WSGI application from
+yatube/wsgi.py is run in a bounded thread pool by core.asgi.AsgiHandler.
+"""
+
+from core.asgi import AsgiHandler
+from yatube.wsgi import application as wsgi_application
+
+application = AsgiHandler(wsgi_application)
@@ -53,12 +53,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.AccessCounterMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -82,6 +84,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Размер пула потоков для Django в yatube/asgi.py (core.asgi)
+ASGI_THREADS = 16
 
 CACHES = {
     'default': {
@@ -100,6 +104,32 @@ DATABASES = {
     }
 }
 
+# PRAGMA, выполняемые на каждом подключении к SQLite (core.db).
+# Пустой словарь оставляет настройки SQLite по умолчанию.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -16000,
+    'temp_store': 'MEMORY',
+}
+
+
+# Сессии читаются из кэша и пишутся в базу. С
+# 'django.contrib.sessions.backends.signed_cookies' сессия хранится в
+# подписанной cookie и не требует ни кэша, ни таблицы django_session.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Пользователь сессии берётся из кэша (users.backends). ModelBackend
+# остаётся, чтобы сессии, созданные до его появления, оставались
+# действительными.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+USER_CACHE_TIMEOUT = 15 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -144,9 +174,31 @@ USE_TZ = True
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+if not DEBUG:
+    # хэшированные имена и заранее сжатые .gz/.br (core.storage);
+    # раздаёт их core.staticfiles.StaticFilesMiddleware из wsgi.py
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Хранилище картинок постов: имя файла - хэш содержимого, файлы
+# разложены по подкаталогам (команда relocate_images переносит старые)
+POST_IMAGE_STORAGE = 'core.storage.ContentAddressedStorage'
+# Варианты картинок для srcset (posts.images): ширины, пропорции
+# карточки и форматы в порядке предпочтения; форматы, которые сборка
+# Pillow не умеет сохранять, пропускаются
+IMAGE_VARIANT_WIDTHS = (480, 960, 1440)
+IMAGE_VARIANT_ASPECT = 960 / 339
+IMAGE_VARIANT_FORMATS = ('avif', 'webp', 'jpeg')
+# Сколько хранить в кэше адрес миниатюры (posts.thumbnails); дальше он
+# читается из таблицы Thumbnail
+THUMBNAIL_URL_TIMEOUT = 7 * 24 * 60 * 60
+# Кто отдаёт медиафайлы (core.staticfiles.MediaFilesMiddleware):
+# None - сам процесс, 'nginx' - X-Accel-Redirect, 'apache' - X-Sendfile
+MEDIA_SENDFILE = None
+# internal location nginx, указывающий на MEDIA_ROOT
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -157,3 +209,76 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 POSTS_LIMIT = 10
+# Ленты групп и авторов в кэше (posts.timelines)
+TIMELINE_LENGTH = 1000
+TIMELINE_TIMEOUT = 24 * 60 * 60
+# Счётчики постов в кэше (posts.counts)
+COUNT_CACHE_TIMEOUT = 24 * 60 * 60
+# Карточки постов в кэше (posts.post_cache)
+POST_CACHE_TIMEOUT = 60 * 60
+# Рейтинг «популярное» (posts.ranking): период полураспада вклада
+# события в секундах и сколько лучших постов показывать
+HOT_HALF_LIFE = 12 * 60 * 60
+HOT_POSTS_LIMIT = 100
+# Потоковая отрисовка страниц со списками постов (posts.utils)
+STREAMING_RENDER = False
+
+# Ограничение частоты запросов (core.throttling)
+THROTTLE_ENABLED = True
+# Заголовок с адресом клиента, например 'HTTP_X_REAL_IP' за прокси
+THROTTLE_IP_HEADER = 'REMOTE_ADDR'
+# Переопределение лимитов из декораторов: {'comment': '10/m'}
+THROTTLE_RATES = {}
+
+# Сжатие ответов (core.middleware.CompressionMiddleware)
+COMPRESS_MIN_SIZE = 512
+COMPRESS_BROTLI_QUALITY = 5
+# Минификация HTML кэшируемых страниц (core.minify)
+HTML_MINIFY = True
+
+# Счётчик обращений (core.access): view -> аргумент, по которому
+# различаются страницы; корзины по часу, хранятся сутки
+ACCESS_COUNTED_VIEWS = {
+    'posts:index': None,
+    'posts:posts': 'slug',
+    'posts:profile': 'username',
+}
+ACCESS_FLUSH_INTERVAL = 10
+ACCESS_BUCKET = 60 * 60
+ACCESS_BUCKETS = 24
+
+# Прогрев кэша (posts.warmup): сколько групп и профилей прогревать,
+# сколько запросов выполнять одновременно и как часто повторять
+# прогрев в фоновом потоке (None - не запускать поток). Ключ кэша страниц
+# зависит от хоста, поэтому страницы запрашиваются с CACHE_WARM_HOST.
+CACHE_WARM_HOST = ALLOWED_HOSTS[0]
+CACHE_WARM_GROUPS = 20
+CACHE_WARM_PROFILES = 20
+CACHE_WARM_CONCURRENCY = 4
+CACHE_WARM_INTERVAL = None
+
+# Сброс кэша обратного прокси по Surrogate-Key (core.edgecache):
+# адрес и метод запроса сброса; None - не сбрасывать
+EDGE_PURGE_URL = None
+EDGE_PURGE_METHOD = 'PURGE'
+EDGE_PURGE_TIMEOUT = 2
+
+# Списки админки (core.paginator): начиная с этого числа строк таблица
+# без фильтров считается по статистике базы, а не COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10000
+
+# Фоновые задачи (core.jobs): потоки пула, сколько хранить прогресс
+# в кэше и выполнять ли задачи сразу, в вызывающем потоке
+JOB_WORKERS = 2
+JOB_STATUS_TIMEOUT = 24 * 60 * 60
+JOBS_EAGER = False
+# Размер пачки массовых операций админки (posts.bulk)
+BULK_BATCH_SIZE = 500
+
+# Архив (posts.archive): возраст поста в днях, после которого команда
+# archive_posts переносит его в архивные таблицы
+ARCHIVE_AFTER_DAYS = 365
+
+# Удаление пользователей (users.deletion): сколько хранить в кэше список
+# мягко удалённых пользователей, чьи посты скрыты
+USER_DELETION_TIMEOUT = 24 * 60 * 60
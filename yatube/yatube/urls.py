@@ -16,8 +16,6 @@ Including another URLconf
 from django.contrib import admin
 # импорт include позволит использовать адреса, включенные в приложения
 from django.urls import include, path
-from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -31,7 +29,4 @@ handler404 = 'core.views.page_not_found'
 # handler500 = 'core.views.server_error'
 handler403 = 'core.views.permission_denied'
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
-    )
+# MEDIA_URL раздаёт core.staticfiles.MediaFilesMiddleware из wsgi.py
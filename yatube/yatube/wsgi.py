@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+from core.staticfiles import (  # noqa: E402
+    MediaFilesMiddleware, StaticFilesMiddleware
+)
+from posts.warmup import start_background_warmer  # noqa: E402
+
+application = StaticFilesMiddleware(MediaFilesMiddleware(application))
+start_background_warmer()